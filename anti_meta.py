@@ -0,0 +1,81 @@
+import numpy as np
+
+
+# --- VECTORIZED WIN / MATCH AGGREGATION ---
+def tally_card_wins(decks, won, n_cards):
+    # One bincount pass: matches and wins per card over an (N, 8) deck matrix
+    decks = np.asarray(decks)
+    flat = decks.ravel()
+    matches = np.bincount(flat, minlength=n_cards)
+    wins = np.bincount(flat, weights=np.repeat(np.asarray(won, dtype=np.float64), decks.shape[1]), minlength=n_cards)
+    return wins, matches
+
+
+def global_win_rates(p1_decks, p2_decks, p1_won, n_cards):
+    p1_won = np.asarray(p1_won)
+    p1_wins, p1_matches = tally_card_wins(p1_decks, p1_won, n_cards)
+    p2_wins, p2_matches = tally_card_wins(p2_decks, 1 - p1_won, n_cards)
+    wins = p1_wins + p2_wins
+    matches = p1_matches + p2_matches
+    # Cards never played by P1 are left out, as in the original per-card scan
+    seen = np.flatnonzero(p1_matches)
+    return seen, wins[seen] / (matches[seen] + 1e-9)
+
+
+def best_counter(wins, matches, baseline_wr, min_matches=500, exclude=None):
+    # Card whose win rate against the hated card beats its own baseline by the most
+    order, delta, matchup_wr = rank_counters(wins, matches, baseline_wr, min_matches, exclude)
+    if len(order) == 0:
+        return None, None, None
+    card = int(order[0])
+    return card, delta[card], matchup_wr[card]
+
+
+def rank_counters(wins, matches, baseline_wr, min_matches=500, exclude=None):
+    # Eligible cards sorted by win-rate delta over their baseline, best first. `exclude` is
+    # the hated card itself: its mirror column is 0.5 by construction, never a counter.
+    wins = np.asarray(wins, dtype=np.float64)
+    matches = np.asarray(matches)
+    eligible = matches >= min_matches
+    if exclude is not None:
+        eligible[exclude] = False
+    matchup_wr = np.divide(wins, matches, out=np.zeros(len(wins)), where=eligible)
+    delta = np.where(eligible, matchup_wr - baseline_wr, -np.inf)
+    order = np.argsort(-delta, kind='stable')
+    return order[:eligible.sum()], delta, matchup_wr
+
+
+# --- CARD-VS-CARD MATCHUP TABLE ---
+def one_hot_decks(decks, n_cards):
+    decks = np.asarray(decks)
+    one_hot = np.zeros((len(decks), n_cards), dtype=np.float32)
+    one_hot[np.repeat(np.arange(len(decks)), decks.shape[1]), decks.ravel()] = 1
+    return one_hot
+
+
+def build_matchup_table(p1_decks, p2_decks, p1_won, n_cards, chunk_size=200_000):
+    # wins[a, b] / matches[a, b]: how decks holding `a` did against decks holding `b`,
+    # both perspectives combined. Chunked one-hot products keep memory bounded.
+    p1_vs_p2 = np.zeros((n_cards, n_cards), dtype=np.int64)
+    p1_wins = np.zeros((n_cards, n_cards), dtype=np.int64)
+    p1_won = np.asarray(p1_won)
+
+    for start in range(0, len(p1_decks), chunk_size):
+        stop = start + chunk_size
+        x1 = one_hot_decks(p1_decks[start:stop], n_cards)
+        x2 = one_hot_decks(p2_decks[start:stop], n_cards)
+        won = p1_won[start:stop].astype(np.float32)
+        p1_vs_p2 += np.rint(x1.T @ x2).astype(np.int64)
+        p1_wins += np.rint((x1 * won[:, None]).T @ x2).astype(np.int64)
+
+    # P2's view is the transpose: it won every P1 matchup that P1 did not win
+    wins = p1_wins + (p1_vs_p2 - p1_wins).T
+    matches = p1_vs_p2 + p1_vs_p2.T
+    return wins, matches
+
+
+def matchup_baseline(wins, matches):
+    # Each battle adds 8 opposing cards to a row, so row sums / 8 give per-card totals
+    card_wins = wins.sum(axis=1) / 8
+    card_matches = matches.sum(axis=1) / 8
+    return np.divide(card_wins, card_matches, out=np.full(len(wins), 0.5), where=card_matches > 0)
@@ -7,15 +7,34 @@ import re
 import base64
 import pickle
 import json
-from collections import Counter
+import importlib.util
+import time
 import streamlit.components.v1 as components
-
-# Try importing TensorFlow gracefully
-try:
-    import tensorflow as tf
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from battle_store import BATTLE_ARCHIVE, archive_signature, load_battles
+from anti_meta import best_counter, matchup_baseline
+from oracle_engine import (
+    KerasOracle, NumpyOracle, WEIGHTS_FILE, build_meta_cache, search_counter_deck, encode_decks, win_rate_vs_pool
+)
+from prediction_cache import LRUCache, canonical_deck, cached_matchup_probability
+from ingest import load_merged_aggregates
+from deck_masks import query_pool
+from deck_optimizer import optimize_deck, deck_synergy
+from card_images import CARD_IMAGE_URL, list_card_images
+from card_stats import CARD_STATS_FILE, build_card_stats, load_card_stats, card_stats_index
+from payloads import (
+    OPTIMIZER_TEMPLATE, asset_signature, data_uri, optimizer_card_data, synergy_payload,
+    compose_optimizer_html, payload_info
+)
+from metrics import METRICS, InstrumentedOracle
+from brackets import bracket_labels
+from engine import ORACLE_POOL_SIZE, engine_from_aggregates, engine_from_battles
+from meta_matrix import TIERS, open_meta_matrix, tier_list
+from archetypes import (
+    ARCHETYPES, HOG_ID, GOLEM_ID, LAVA_ID, BALLOON_ID, X_BOW_ID, card_lookup, classify_chunk, archetype_win_rates
+)
+
+# TensorFlow is only imported when the NumPy weights export is missing
+TF_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
 
 # --- SET YOUR LOCAL IMAGE & FONT FILENAMES HERE ---
 LOCAL_BACKGROUND_IMAGE = "wallpape.jpeg"
@@ -25,7 +44,9 @@ LOCAL_FONT_FILE = "Clash_Regular.otf"
 # 1. Page Configuration & Styling
 st.set_page_config(page_title="Clash Royale Predictor", layout="wide", initial_sidebar_state="collapsed")
 
-def get_base64_of_bin_file(bin_file):
+@st.cache_resource
+def get_base64_of_bin_file(bin_file, signature=None):
+    # `signature` (payloads.asset_signature) keys the cache, so an edited file is re-read
     try:
         with open(bin_file, 'rb') as f:
             data = f.read()
@@ -34,18 +55,25 @@ def get_base64_of_bin_file(bin_file):
         return None
 
 def local_css(image_file, font_file):
-    encoded_img = get_base64_of_bin_file(image_file)
-    if encoded_img:
-        bg_url = f"url('data:image/jpeg;base64,{encoded_img}')"
+    # Composed once per process (per asset version); only the st.markdown call runs on every rerun
+    css = compose_app_css(image_file, font_file, asset_signature([image_file, font_file]))
+    st.markdown(css["html"], unsafe_allow_html=True)
+
+@st.cache_resource
+def compose_app_css(image_file, font_file, signature):
+    start = time.perf_counter()
+    image_uri = data_uri(image_file, "image/jpeg")
+    if image_uri:
+        bg_url = f"url('{image_uri}')"
     else:
         bg_url = "none"
 
-    encoded_font = get_base64_of_bin_file(font_file)
-    if encoded_font:
+    font_uri = data_uri(font_file, "font/otf")
+    if font_uri:
         font_face_rule = f"""
         @font-face {{
             font-family: 'ClashFont';
-            src: url('data:font/otf;base64,{encoded_font}') format('opentype');
+            src: url('{font_uri}') format('opentype');
         }}
         """
         font_family_name = "'ClashFont', sans-serif"
@@ -167,10 +195,18 @@ def local_css(image_file, font_file):
     final_css = css_template.replace("BACKGROUND_IMAGE_URL", bg_url)
     final_css = final_css.replace("FONT_FACE_RULE", font_face_rule)
     final_css = final_css.replace("FONT_FAMILY_NAME", font_family_name)
-    st.markdown(final_css, unsafe_allow_html=True)
+    return dict(payload_info(final_css), html=final_css, build_ms=(time.perf_counter() - start) * 1000)
 
 local_css(LOCAL_BACKGROUND_IMAGE, LOCAL_FONT_FILE)
 
+# Days of ingested battle aggregates to use (None = every ingested day)
+AGGREGATE_WINDOW_DAYS = None
+
+# Engine metrics export after every rerun (None = off): Prometheus text file rewritten
+# in place, JSON snapshots appended one per line. Open the app with ?admin=1 for the panel.
+METRICS_PROM_FILE = None
+METRICS_JSON_LOG = None
+
 RARITY_ORDER = {
     "Champion": 1, "Legendary": 2, "Epic": 3, "Rare": 4, "Common": 5
 }
@@ -218,54 +254,103 @@ def load_csv_data():
         df_winrates, df_analytics, df_synergy = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
     return df_winrates, df_analytics, df_synergy
 
-@st.cache_data(show_spinner="Booting up the Anti-Meta Engine (Parsing millions of rows)...")
-def load_anti_meta_engine():
+OPTIMIZER_ASSETS = [OPTIMIZER_TEMPLATE, "cards_i18n.json", "synergy_datasetFinal.csv", LOCAL_BACKGROUND_IMAGE, LOCAL_FONT_FILE]
+
+@st.cache_resource(show_spinner="Composing the Deck Optimizer...")
+@METRICS.timed("optimizer_payload_build")
+def load_optimizer_payload(signature):
+    # optimizer.html with card data and synergy matrix inlined as compact JSON, wallpaper
+    # and font as data URIs. Rebuilt only when one of OPTIMIZER_ASSETS changes.
+    start = time.perf_counter()
     try:
-        dataset = pd.read_csv('20231106.zip', header=None)
-        column_names = [
-            "temp1", "temp2", "id1", "Trophies1", "Crowns1",
-            "Card1-1", "Card1-2", "Card1-3", "Card1-4", "Card1-5", "Card1-6", "Card1-7", "Card1-8",
-            "id2", "Trophies2", "Crowns2",
-            "Card2-1", "Card2-2", "Card2-3", "Card2-4", "Card2-5", "Card2-6", "Card2-7", "Card2-8"
-        ]
-        dataset.columns = column_names
-        dataset.drop(["temp1", "temp2", "id1", "id2"], axis=1, inplace=True, errors='ignore')
-        dataset.dropna(inplace=True)
-
-        p1_decks = dataset[[f'Card1-{i}' for i in range(1, 9)]].values
-        p2_decks = dataset[[f'Card2-{i}' for i in range(1, 9)]].values
-        p1_won = np.where(dataset['Crowns1'] > dataset['Crowns2'], 1, 0)
-        p2_won = 1 - p1_won
-
-        unique_cards = np.unique(p1_decks)
-        global_wr = {}
-        for card in unique_cards:
-            p1_mask = (p1_decks == card).any(axis=1)
-            p2_mask = (p2_decks == card).any(axis=1)
-            matches = p1_mask.sum() + p2_mask.sum()
-            wins = p1_won[p1_mask].sum() + p2_won[p2_mask].sum()
-            global_wr[card] = wins / (matches + 1e-9)
-
-        all_winning_decks = np.vstack((p1_decks[p1_won == 1], p2_decks[p2_won == 1]))
-        winning_decks_list = [tuple(sorted(row)) for row in all_winning_decks]
-        deck_counts = Counter(winning_decks_list)
-        
-        # Meta pool for Hate Engine (5000) and Oracle (1000)
-        meta_pool_5000 = [list(deck) for deck, count in deck_counts.most_common(5000)]
-        meta_pool_1000 = meta_pool_5000[:1000]
-        
-        return p1_decks, p2_decks, p1_won, global_wr, meta_pool_5000, meta_pool_1000
+        with open(OPTIMIZER_TEMPLATE, "r", encoding="utf-8") as f:
+            template = f.read()
     except FileNotFoundError:
-        return None, None, None, None, None, None
+        return None
+
+    missing = []
+    try:
+        cards = optimizer_card_data("cards_i18n.json")
+    except FileNotFoundError:
+        cards = None
+        missing.append("cards_i18n.json")
+    try:
+        synergy = synergy_payload(pd.read_csv("synergy_datasetFinal.csv", index_col=0))
+    except FileNotFoundError:
+        synergy = None
+        missing.append("synergy_datasetFinal.csv")
+
+    html = compose_optimizer_html(
+        template, cards, synergy,
+        data_uri(LOCAL_BACKGROUND_IMAGE, "image/jpeg"), data_uri(LOCAL_FONT_FILE, "font/opentype")
+    )
+    return dict(payload_info(html), html=html, missing=missing, build_ms=(time.perf_counter() - start) * 1000)
+
+@st.cache_resource(show_spinner="Booting up the Anti-Meta Engine...")
+@METRICS.timed("engine_load")
+def load_anti_meta_engine():
+    # One immutable engine per process (see engine.py), shared by reference with every
+    # session and rerun instead of being unpickled into a fresh copy each time.
+    # Multi-day aggregates from `python build.py ingest` win over single-day battles.
+    aggregates = load_merged_aggregates(window_days=AGGREGATE_WINDOW_DAYS)
+    if aggregates is not None:
+        return engine_from_aggregates(aggregates)
+
+    # Memory-mapped battle store (see build.py); a raw zip is turned into one on first load
+    battles = load_battles(BATTLE_ARCHIVE, persist=True)
+    if battles is None:
+        return None
+    return engine_from_battles(battles, source=archive_signature(BATTLE_ARCHIVE))
 
 @st.cache_resource(show_spinner="Loading Deep Learning Model...")
+@METRICS.timed("model_load")
 def load_oracle_model():
+    # Pure NumPy forward pass when the exported weights exist (see build.py export-model).
+    # Wrapped so every model call records its batch size.
+    try:
+        return InstrumentedOracle(NumpyOracle.load(WEIGHTS_FILE))
+    except Exception:
+        pass
     if not TF_AVAILABLE: return None
     try:
-        return tf.keras.models.load_model('clash_royale_nn_model.keras')
+        import tensorflow as tf
+        return InstrumentedOracle(KerasOracle(tf.keras.models.load_model('clash_royale_nn_model.keras')))
     except Exception:
         return None
 
+@st.cache_resource(show_spinner="Caching Meta Deck Embeddings...")
+@METRICS.timed("meta_cache_build")
+def load_oracle_meta_cache(_oracle, _card_to_idx, meta_pool):
+    # Meta-deck tower evaluated once per process; queries only run the opponent side.
+    # Oracle answers are memoized per canonical opponent deck alongside the pool they came from.
+    if _oracle is None or _card_to_idx is None or meta_pool is None:
+        return None, None, None
+    meta_batch, meta_projection = build_meta_cache(_oracle, meta_pool, _card_to_idx)
+    return meta_batch, meta_projection, LRUCache(maxsize=5_000)
+
+@st.cache_resource(show_spinner="Opening Meta Matchup Matrix...")
+@METRICS.timed("meta_matrix_load")
+def load_meta_matrix(meta_pool):
+    # Pairwise win probabilities prebuilt for this pool and model (`python build.py meta-matrix`),
+    # memory-mapped, with each pool deck's row and the tier list; None when not built
+    if meta_pool is None:
+        return None
+    win_probs = open_meta_matrix(meta_pool, (len(meta_pool), ORACLE_POOL_SIZE))
+    if win_probs is None:
+        return None
+    order, expected, tiers = tier_list(win_probs)
+    rows = {tuple(int(c) for c in deck): i for i, deck in enumerate(meta_pool[:len(win_probs)])}
+    return {"win_probs": win_probs, "rows": rows, "order": order, "expected": expected, "tiers": tiers}
+
+@st.cache_resource
+def get_matchup_prediction_cache():
+    # Process-wide: shared by every session, keyed on order-invariant deck pairs
+    return LRUCache(maxsize=50_000)
+
+@st.cache_resource
+def load_local_card_images():
+    return list_card_images()
+
 @st.cache_data(show_spinner="Loading Card Encodings...")
 def load_card_mapping():
     try:
@@ -288,84 +373,70 @@ id_to_name = {v['id']: k for k, v in card_dict.items()}
 name_to_id = {k: v['id'] for k, v in card_dict.items()}
 
 df_winrates, df_analytics, synergy_df = load_csv_data()
-p1_decks, p2_decks, p1_won, global_wr, meta_pool_5000, meta_pool_1000 = load_anti_meta_engine()
+local_card_images = load_local_card_images()
+anti_meta_engine = load_anti_meta_engine()
 oracle_model = load_oracle_model()
 card_to_idx = load_card_mapping()
 
+# --- TROPHY BRACKET SELECTOR ---
+# Every bracket is a complete engine built at load time, so switching only rebinds globals
+ALL_TROPHIES = "All trophies"
+bracket_choices = {ALL_TROPHIES: anti_meta_engine}
+for label, bracket in zip(bracket_labels(), anti_meta_engine.brackets if anti_meta_engine else ()):
+    if bracket.n_battles > 0:
+        bracket_choices[f"{label} ({bracket.n_battles:,} battles)"] = bracket
+bracket_col, _ = st.columns([0.3, 0.7])
+with bracket_col:
+    active_bracket = st.selectbox(
+        "🏆 Trophy bracket", list(bracket_choices), key="trophy_bracket", disabled=len(bracket_choices) == 1,
+        help="Segments global win rates, the Anti-Meta Engine and the Oracle's meta pool by the players' trophies."
+    )
+    active_engine = bracket_choices[active_bracket]
+
+if active_engine is not None:
+    battle_card_ids = active_engine.card_ids
+    global_wr = active_engine.global_wr
+    meta_pool_5000, meta_pool_1000 = active_engine.meta_pool_5000, active_engine.meta_pool_1000
+    meta_pool_index = active_engine.meta_index
+    matchup_wins, matchup_matches = active_engine.matchup_wins, active_engine.matchup_matches
+    archetype_wins, archetype_matches = active_engine.archetype_wins, active_engine.archetype_matches
+else:
+    battle_card_ids = global_wr = None
+    meta_pool_5000 = meta_pool_1000 = meta_pool_index = matchup_wins = matchup_matches = None
+    archetype_wins = archetype_matches = None
+battle_card_index = {int(c): i for i, c in enumerate(battle_card_ids)} if battle_card_ids is not None else {}
+# Baseline win rate per encoded card (0.5 when unseen), for vectorized delta scoring. Taken from
+# the matchup table itself, as Card Analytics' counters are, so both views rank on one baseline.
+baseline_wr_by_index = matchup_baseline(matchup_wins, matchup_matches) if matchup_wins is not None else None
+oracle_meta_batch, oracle_meta_projection, oracle_result_cache = load_oracle_meta_cache(oracle_model, card_to_idx, meta_pool_1000)
+if oracle_result_cache is not None:
+    METRICS.register_cache("oracle_results", oracle_result_cache)
+METRICS.register_cache("matchup_predictions", get_matchup_prediction_cache())
+meta_matrix = load_meta_matrix(meta_pool_5000)
+
 if card_to_idx:
     idx_to_card = {idx: card_id for card_id, idx in card_to_idx.items()}
 else:
     idx_to_card = {}
 
 def get_img_url(card_name):
-    if card_name in card_dict:
-        return f"https://raw.githubusercontent.com/RoyaleAPI/cr-api-assets/master/cards/{card_dict[card_name]['key']}.png"
-    return f'https://raw.githubusercontent.com/RoyaleAPI/cr-api-assets/master/cards/little-prince.png'
+    # Local thumbnail from `python build.py images` when present, else the RoyaleAPI original
+    key = card_dict[card_name]['key'] if card_name in card_dict else 'little-prince'
+    return local_card_images.get(key) or CARD_IMAGE_URL.format(key=key)
 
 # --- NEW: ARCHETYPE & ELIXIR LOGIC ---
-HOG_ID = 26000021
-GOLEM_ID = 26000009
-LAVA_ID = 26000029
-BALLOON_ID = 26000006
-X_BOW_ID = 27000008
+# Same vectorized classifier the archetype win-rate table is built with (see archetypes.py)
+archetype_card_ids = np.array(sorted(id_to_name), dtype=np.int64)
+archetype_card_pos = {int(c): i for i, c in enumerate(archetype_card_ids)}
+archetype_lookup = card_lookup(archetype_card_ids, {card_id: card_dict[name] for card_id, name in id_to_name.items()})
 
 def get_deck_metadata(deck_names):
     if len(deck_names) != 8:
         return None, None
 
-    card_ids = [card_dict[name]['id'] for name in deck_names]
-    card_set = set(card_ids)
-
-    type_count = {"Troop": 0, "Spell": 0, "Building": 0}
-    total_elixir = 0
-    heavy_cards = 0      
-    cheap_cards = 0      
-
-    for name in deck_names:
-        t = card_dict[name].get('type', 'Troop').capitalize()
-        if t in type_count:
-            type_count[t] += 1
-        else:
-            type_count[t] = 1
-
-        elx = card_dict[name].get('elixir', 0)
-        total_elixir += elx
-
-        if elx >= 5:
-            heavy_cards += 1
-        if elx <= 2:
-            cheap_cards += 1
-
-    avg_elixir = total_elixir / 8
-
-    troop = type_count.get("Troop", 0)
-    spell = type_count.get("Spell", 0)
-    building = type_count.get("Building", 0)
-
-    archetype = "Control" # Default Fallback
-
-    # Specific Archetypes
-    if HOG_ID in card_set and avg_elixir <= 3.3:
-        archetype = "Hog Cycle"
-    elif GOLEM_ID in card_set and avg_elixir >= 4.0:
-        archetype = "Golem Beatdown"
-    elif LAVA_ID in card_set and BALLOON_ID in card_set:
-        archetype = "LavaLoon"
-    elif X_BOW_ID in card_set and building >= 1:
-        archetype = "X-Bow Cycle"
-    elif cheap_cards >= 3 and spell >= 2 and avg_elixir <= 3.5:
-        archetype = "Log Bait"
-    # General Archetypes
-    elif avg_elixir >= 3.9 and heavy_cards >= 2:
-        archetype = "Beatdown"
-    elif avg_elixir <= 3.4 and cheap_cards >= 2:
-        archetype = "Cycle"
-    elif building >= 1 and avg_elixir <= 3.6:
-        archetype = "Siege"
-    elif 3.4 < avg_elixir < 4.0:
-        archetype = "Control"
-
-    return archetype, avg_elixir
+    deck = np.array([[archetype_card_pos[card_dict[name]['id']] for name in deck_names]])
+    meta = classify_chunk(deck, archetype_lookup)
+    return ARCHETYPES[meta["archetype"][0]], float(meta["avg_elixir"][0])
 
 def render_deck_metadata_panel(archetype, avg_elixir):
     st.markdown(f"""
@@ -383,6 +454,33 @@ def render_deck_metadata_panel(archetype, avg_elixir):
         </div>
     """, unsafe_allow_html=True)
 
+def render_archetype_matchup(deck1, deck2):
+    # Historical win rate of deck 1's archetype against deck 2's in the selected bracket:
+    # a lookup into the engine's precomputed table, no model call
+    if archetype_matches is None or len(deck1) != 8 or len(deck2) != 8:
+        return
+    (arch1, _), (arch2, _) = get_deck_metadata(deck1), get_deck_metadata(deck2)
+    row, col = ARCHETYPES.index(arch1), ARCHETYPES.index(arch2)
+    matches = int(archetype_matches[row, col])
+    if matches:
+        record = f"{arch1} won <b>{archetype_wins[row, col] / matches * 100:.1f}%</b> of {matches:,} recorded battles"
+    else:
+        record = "No recorded battles between these archetypes yet"
+    st.markdown(f"""
+        <div style='text-align: center; margin-bottom: 15px; padding: 10px; background: rgba(20, 30, 48, 0.9);
+                    border-radius: 10px; border: 2px solid #ffd700;'>
+            <span style='color: #a9a9a9; font-size: 14px; text-transform: uppercase;'>Archetype Matchup · {arch1} vs {arch2}</span><br>
+            <span style='color: #ffffff; font-size: 18px; text-shadow: 1px 1px #000;'>📜 {record}</span>
+        </div>
+    """, unsafe_allow_html=True)
+
+    with st.expander("📊 Archetype vs Archetype Win Rates"):
+        rates = pd.DataFrame(archetype_win_rates(archetype_wins, archetype_matches) * 100, index=ARCHETYPES, columns=ARCHETYPES)
+        fig = px.imshow(rates, text_auto='.1f', color_continuous_scale='RdYlGn', zmin=35, zmax=65, aspect='auto',
+                        labels=dict(x="Opponent archetype", y="Archetype", color="Win %"))
+        fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), height=420, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white', size=11, family="ClashFont, Arial, sans-serif"), dragmode=False)
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
 def render_read_only_deck(deck):
     rows = [st.columns(4) for _ in range(2)]
     flat_cols = [col for row in rows for col in row]
@@ -400,83 +498,168 @@ def render_read_only_deck(deck):
             render_deck_metadata_panel(archetype, avg_elx)
 
 # --- ENGINE 1: I HATE THIS CARD ALGORITHM ---
+@METRICS.timed("hate_counter")
 def get_hate_card_counter(hated_card_id):
-    if p1_decks is None:
+    if global_wr is None:
         return None, "Dataset 20231106.csv missing.", None, None, None, None
         
-    p2_has_hated = (p2_decks == hated_card_id).any(axis=1)
-    p1_vs_hated_decks = p1_decks[p2_has_hated]
-    p1_vs_hated_wins = p1_won[p2_has_hated]
-    
-    if len(p1_vs_hated_wins) == 0:
+    if hated_card_id not in battle_card_index:
         return None, "Not enough data for this card.", None, None, None, None
 
-    card_matches = {}
-    card_wins = {}
-    
-    for i in range(8):
-        cards_in_col = p1_vs_hated_decks[:, i]
-        for card, win in zip(cards_in_col, p1_vs_hated_wins):
-            card_matches[card] = card_matches.get(card, 0) + 1
-            card_wins[card] = card_wins.get(card, 0) + win
-            
-    best_counter_card = None
-    best_delta = -999
-    best_wr = 0
+    # Precomputed table: every card's record against decks holding the hated card
+    hated_idx = battle_card_index[hated_card_id]
+    vs_wins, vs_matches = matchup_wins[:, hated_idx], matchup_matches[:, hated_idx]
     
-    for card, matches in card_matches.items():
-        if matches >= 500: 
-            matchup_wr = card_wins[card] / matches
-            baseline_wr = global_wr.get(card, 0.5)
-            delta = matchup_wr - baseline_wr 
-            
-            if delta > best_delta:
-                best_delta = delta
-                best_wr = matchup_wr
-                best_counter_card = card
+    if vs_matches.sum() == 0:
+        return None, "Not enough data for this card.", None, None, None, None
+
+    best_counter_card, best_delta, best_wr = best_counter(vs_wins, vs_matches, baseline_wr_by_index, exclude=hated_idx)
                 
     if best_counter_card is None:
         return None, "Not enough significant matchups found.", None, None, None, None
         
+    # Best meta deck with the counter that doesn't run the hated card itself, else any with the counter
+    positions = query_pool(meta_pool_index, include=[best_counter_card], exclude=[hated_idx], k=1)
+    if len(positions) == 0:
+        positions = query_pool(meta_pool_index, include=[best_counter_card], k=1)
+
+    global_winrate = baseline_wr_by_index[best_counter_card]
+    best_counter_card = int(battle_card_ids[best_counter_card])
     counter_name = id_to_name.get(best_counter_card, "Unknown")
-    global_winrate = global_wr.get(best_counter_card, 0)
     
-    for deck in meta_pool_5000:
-        if best_counter_card in deck:
-            deck_names = [id_to_name.get(card, "Unknown") for card in deck]
-            return deck, deck_names, counter_name, best_delta, best_wr, global_winrate
+    if len(positions) > 0:
+        deck = [int(card) for card in meta_pool_5000[positions[0]]]
+        deck_names = [id_to_name.get(card, "Unknown") for card in deck]
+        return deck, deck_names, counter_name, best_delta, best_wr, global_winrate
             
     return None, "No viable meta deck contains the counter card.", None, None, None, None
 
 # --- ENGINE 2: NEURAL NETWORK ORACLE ---
-def recommend_counter_deck(opponent_deck_raw):
+@METRICS.timed("oracle_counter")
+def recommend_counter_deck(opponent_deck_raw, search_budget=0.0):
     if oracle_model is None or card_to_idx is None:
         return [], 0, "Model or Mapping file missing! Ensure 'clash_royale_nn_model.keras' and 'card_mapping.pkl' are present."
     if meta_pool_1000 is None:
         return [], 0, "Meta pool not built. Ensure '20231106.csv' is present."
 
     mapped_opponent = [card_to_idx.get(card, 0) for card in opponent_deck_raw]
-    opponent_batch = np.array([mapped_opponent] * len(meta_pool_1000), dtype=np.int32)
+    opponent_key = (canonical_deck(mapped_opponent), search_budget)
+    cached = oracle_result_cache.get(opponent_key)
+    if cached is not None:
+        return cached
     
-    mapped_meta_pool = []
-    for deck in meta_pool_1000:
-        safe_deck = [card_to_idx.get(c, c) if c > 500 else c for c in deck]
-        mapped_meta_pool.append(safe_deck)
-        
-    meta_batch = np.array(mapped_meta_pool, dtype=np.int32)
-    
-    if len(oracle_model.inputs) != 2:
-        return [], 0, "Neural Network Architecture Mismatch! Expected 2-Input model."
-    
-    probabilities = oracle_model.predict([opponent_batch, meta_batch], verbose=0).flatten()
-    best_match_idx = np.argmax(probabilities)
-    highest_win_prob = probabilities[best_match_idx]
+    pool_row = None
+    if meta_matrix is not None and meta_matrix["win_probs"].shape[1] >= len(oracle_meta_batch):
+        pool_row = meta_matrix["rows"].get(tuple(sorted(int(card) for card in opponent_deck_raw)))
+
+    if search_budget > 0:
+        # Beam search over card swaps, seeded from the best meta decks
+        best_deck_mapped, highest_win_prob, _ = search_counter_deck(
+            oracle_model, mapped_opponent, oracle_meta_batch, oracle_meta_projection,
+            len(card_to_idx), time_budget=search_budget
+        )
+    elif pool_row is not None:
+        # Opponent is a meta deck: its row of the prebuilt matrix, no model call
+        probabilities = meta_matrix["win_probs"][pool_row, :len(oracle_meta_batch)]
+        best_match_idx = int(np.argmax(probabilities))
+        highest_win_prob = float(probabilities[best_match_idx])
+        best_deck_mapped = oracle_meta_batch[best_match_idx]
+    else:
+        probabilities = oracle_model.score_against(mapped_opponent, oracle_meta_projection)
+        best_match_idx = np.argmax(probabilities)
+        highest_win_prob = probabilities[best_match_idx]
+        best_deck_mapped = oracle_meta_batch[best_match_idx]
     
-    best_deck_mapped = meta_batch[best_match_idx]
     best_deck_raw = [idx_to_card.get(idx, idx) for idx in best_deck_mapped]
     best_deck_names = [id_to_name.get(card, "Unknown") for card in best_deck_raw]
     
-    return best_deck_names, highest_win_prob, "Success"
+    result = (best_deck_names, highest_win_prob, "Success")
+    oracle_result_cache.put(opponent_key, result)
+    return result
+
+# --- META TIER LIST ---
+@st.cache_resource(show_spinner="Ranking the Meta...")
+def load_meta_tier_table(meta_pool):
+    # Pool decks best first by expected win rate against the field (see meta_matrix.tier_list)
+    matrix = load_meta_matrix(meta_pool)
+    if matrix is None:
+        return None
+    rows = []
+    for rank, pos in enumerate(matrix["order"], start=1):
+        names = [id_to_name.get(int(card), "Unknown") for card in meta_pool[pos]]
+        archetype, avg_elixir = get_deck_metadata(names) if "Unknown" not in names else ("Unknown", None)
+        rows.append({
+            "Rank": rank, "Tier": str(matrix["tiers"][pos]), "Expected Win Rate": matrix["expected"][pos] * 100,
+            "Archetype": archetype, "Avg Elixir": avg_elixir, "Deck": " · ".join(names),
+        })
+    return pd.DataFrame(rows)
+
+# --- SYNERGY MATRIX ARRAYS ---
+# Columns named Unknown_<id> map back to app card names
+synergy_card_names = [
+    id_to_name.get(int(col.split("_")[1]), col) if col.startswith("Unknown_") else col
+    for col in synergy_df.columns
+]
+synergy_card_pos = {name: i for i, name in enumerate(synergy_card_names)}
+synergy_matrix = synergy_df.to_numpy(dtype=np.float64) if not synergy_df.empty else None
+synergy_elixir = np.array([card_dict.get(name, {}).get('elixir', 0) for name in synergy_card_names], dtype=np.float64)
+
+# --- CARD STATS INDEX ---
+# card_id -> {win_rate, matches, elixir, type, synergies, counters, ...}: one dict lookup per card panel.
+@st.cache_resource(show_spinner="Loading Card Stats...")
+def load_card_stats_lookup(bracket, _engine):
+    # The table from `python build.py card-stats`, else assembled once per process and
+    # bracket from the engine's win rates, match counts and matchup table
+    table = load_card_stats(CARD_STATS_FILE)
+    if table is None:
+        if _engine is not None:
+            win_rates, matches = _engine.global_wr, _engine.card_matches
+        elif not df_winrates.empty:
+            win_rates, matches = dict(zip(df_winrates['Card_ID'], df_winrates['Win_Rate'] / 100)), {}
+        else:
+            win_rates, matches = {}, {}
+        table = build_card_stats(
+            {v['id']: v for v in card_dict.values()}, win_rates, matches,
+            [name_to_id.get(name, -1) for name in synergy_card_names],
+            synergy_matrix if synergy_matrix is not None else np.zeros((0, 0)),
+            *((_engine.card_ids, _engine.matchup_wins, _engine.matchup_matches) if _engine is not None else ())
+        )
+    return card_stats_index(table)
+
+card_stats = load_card_stats_lookup(active_bracket, active_engine)
+
+# --- ENGINE 3: MULTI-SWAP DECK OPTIMIZER ---
+WIN_CONDITION_IDS = {HOG_ID, GOLEM_ID, LAVA_ID, BALLOON_ID, X_BOW_ID}
+OPTIMIZER_SHORTLIST = 32
+
+@METRICS.timed("deck_optimizer")
+def optimize_deck_synergy(deck_names, max_swaps=3, elixir_range=None, keep_win_condition=False, rerank=False):
+    if synergy_matrix is None:
+        return [], "Synergy matrix missing! Ensure 'synergy_datasetFinal.csv' is present."
+    missing = [name for name in deck_names if name not in synergy_card_pos]
+    if missing:
+        return [], f"No synergy data for: {', '.join(missing)}"
+
+    deck = np.array([synergy_card_pos[name] for name in deck_names])
+    locked = [synergy_card_pos[name] for name in deck_names if card_dict[name]['id'] in WIN_CONDITION_IDS] if keep_win_condition else []
+    reached = optimize_deck(
+        synergy_matrix, deck, max_swaps=max_swaps, beam_width=8,
+        locked_cards=locked, elixir=synergy_elixir, elixir_range=elixir_range
+    )[:OPTIMIZER_SHORTLIST]
+    if not reached:
+        return [], f"No deck within the constraints is reachable in {max_swaps} swaps. Widen the elixir range or allow more swaps."
+    results = [
+        ([synergy_card_names[c] for c in deck], score,
+         [(slot, synergy_card_names[out], synergy_card_names[inc]) for slot, out, inc in swaps])
+        for deck, score, swaps in reached
+    ]
+
+    # Neural Network re-rank: mean win probability against the 1,000 cached meta decks
+    if rerank and oracle_model is not None and oracle_meta_projection is not None:
+        model_decks = encode_decks([[name_to_id[name] for name in names] for names, _, _ in results], card_to_idx)
+        win_rates = win_rate_vs_pool(oracle_model, model_decks, oracle_meta_projection)
+        return [results[i] + (win_rates[i],) for i in np.argsort(-win_rates, kind='stable')], "Success"
+    return [result + (None,) for result in results], "Success"
 
 # Initialize Session States
 if 'deck1' not in st.session_state: st.session_state.deck1 = []
@@ -501,7 +684,7 @@ if st.session_state.editing_player is None:
     
     # ---------------- TAB 1 ----------------
     with tab_battle:
-        logo_base64 = get_base64_of_bin_file(LOCAL_LOGO_IMAGE)
+        logo_base64 = get_base64_of_bin_file(LOCAL_LOGO_IMAGE, asset_signature([LOCAL_LOGO_IMAGE]))
         if logo_base64:
             st.markdown(f"<div style='text-align: center; margin-bottom: 20px;'><img src='data:image/png;base64,{logo_base64}' style='max-height: 250px;'></div>", unsafe_allow_html=True)
         else:
@@ -534,9 +717,10 @@ if st.session_state.editing_player is None:
             render_read_only_deck(st.session_state.deck2)
 
         st.markdown("---")
+        render_archetype_matchup(st.session_state.deck1, st.session_state.deck2)
         if st.button("🔮 PREDICT WINNER", use_container_width=True, type="primary"):
             if len(st.session_state.deck1) == 8 and len(st.session_state.deck2) == 8:
-                if not TF_AVAILABLE or oracle_model is None or card_to_idx is None:
+                if oracle_model is None or card_to_idx is None:
                     st.error("⚠️ Model not loaded! Please check your .keras and .pkl files.")
                 else:
                     with st.spinner("Analyzing matchup using Deep Learning..."):
@@ -548,14 +732,13 @@ if st.session_state.editing_player is None:
                         p1_mapped = [card_to_idx.get(c, 0) if c > 500 else c for c in p1_ids]
                         p2_mapped = [card_to_idx.get(c, 0) if c > 500 else c for c in p2_ids]
                         
-                        # 3. Convert to Neural Network tensor batches (Shape: 1x8)
-                        p1_batch = np.array([p1_mapped], dtype=np.int32)
-                        p2_batch = np.array([p2_mapped], dtype=np.int32)
-                        
-                        # 4. Make the Live Prediction!
+                        # 3. Make the Live Prediction (reused across sessions for any card order)!
                         # The model predicts the probability of Player 2 winning. 
                         # So Player 1's win probability is (1 - prediction).
-                        prediction = oracle_model.predict([p1_batch, p2_batch], verbose=0).flatten()[0]
+                        with METRICS.span("battle_predictor"):
+                            prediction = cached_matchup_probability(
+                                get_matchup_prediction_cache(), oracle_model, p1_mapped, p2_mapped
+                            )
                         
                         p2_win_prob = prediction * 100
                         p1_win_prob = (1 - prediction) * 100
@@ -579,7 +762,7 @@ if st.session_state.editing_player is None:
             find_counter = st.button("🔍 Find Counter Deck", type="primary", use_container_width=True)
             
         if find_counter:
-            if p1_decks is None:
+            if global_wr is None:
                 st.error("⚠️ Unable to run the engine. Make sure '20231106.csv' is in your deployment folder!")
             else:
                 with st.spinner("Crunching win-rate deltas across millions of games..."):
@@ -619,16 +802,20 @@ if st.session_state.editing_player is None:
             render_read_only_deck(st.session_state.deck3)
 
             st.write("")
+            search_budget = st.slider(
+                "⏱️ Search budget (seconds)", min_value=0.0, max_value=5.0, value=0.0, step=0.5,
+                help="0 picks the best of the top 1,000 meta decks. Higher budgets also explore single and double card swaps."
+            )
             if st.button("🔮 GENERATE COUNTER DECK", use_container_width=True, type="primary"):
                 if len(st.session_state.deck3) != 8:
                     st.error("⚠️ The Opponent Deck must have exactly 8 cards!")
                 else:
-                    if not TF_AVAILABLE:
-                        st.error("⚠️ TensorFlow is not installed. Please install it to use the Neural Network.")
+                    if oracle_model is None:
+                        st.error("⚠️ Model not loaded! Export the NumPy weights or install TensorFlow to use the Neural Network.")
                     else:
                         with st.spinner("Simulating 1,000 matchups using Deep Learning..."):
                             raw_input_ids = [name_to_id[name] for name in st.session_state.deck3]
-                            recommended_deck, win_prob, msg = recommend_counter_deck(raw_input_ids)
+                            recommended_deck, win_prob, msg = recommend_counter_deck(raw_input_ids, search_budget)
                             
                             if recommended_deck:
                                 st.session_state.oracle_result_deck = recommended_deck
@@ -648,6 +835,26 @@ if st.session_state.editing_player is None:
             else:
                 st.info("Input an Opponent Deck and click Generate to see the Oracle's prediction.")
 
+        st.markdown("---")
+        st.markdown("<h3 style='text-align: center; color: #9b59b6; text-shadow: 2px 2px #000;'>🏅 Meta Tier List</h3>", unsafe_allow_html=True)
+        tier_table = load_meta_tier_table(meta_pool_5000)
+        if tier_table is None:
+            st.info("Run `python build.py meta-matrix` to rank the meta decks by their expected win rate against the field.")
+        else:
+            tier_bands = ", ".join(
+                f"{name} = {'top' if i == 0 else 'bottom' if i == len(TIERS) - 1 else 'next'} {round((hi - lo) * 100)}%"
+                for i, ((name, lo), hi) in enumerate(zip(TIERS, [1.0] + [q for _, q in TIERS[:-1]]))
+            )
+            st.caption(f"{len(tier_table):,} meta decks ranked by their mean Neural Network win probability against the rest of the pool, from both seats. {tier_bands}.")
+            shown_tiers = st.multiselect("Tiers", [name for name, _ in TIERS], default=[name for name, _ in TIERS[:2]], key="meta_tiers")
+            st.dataframe(
+                tier_table[tier_table["Tier"].isin(shown_tiers)], hide_index=True, use_container_width=True,
+                column_config={
+                    "Expected Win Rate": st.column_config.NumberColumn(format="%.2f%%"),
+                    "Avg Elixir": st.column_config.NumberColumn(format="%.1f"),
+                }
+            )
+
     # ---------------- TAB 4 (ANALYTICS) ----------------
     with tab_analytics:
         st.markdown("<h2 style='text-align: center; color: #ffd700; text-shadow: 2px 2px #000;'>📊 Card Analytics Dashboard</h2>", unsafe_allow_html=True)
@@ -682,17 +889,15 @@ if st.session_state.editing_player is None:
                     st.image(get_img_url(card), use_container_width=True)
                 with head2:
                     st.markdown(f"<h1 style='color:#ffd700; margin:0;'>{card}</h1>", unsafe_allow_html=True)
-                    wr_val = "N/A"
-                    if not df_winrates.empty and card_id in df_winrates['Card_ID'].values:
-                        wr_val = f"{df_winrates.loc[df_winrates['Card_ID'] == card_id, 'Win_Rate'].values[0]:.1f}%"
+                    stats = card_stats.get(card_id)
+                    wr_val = f"{stats['win_rate'] * 100:.1f}%" if stats and stats['win_rate'] is not None else "N/A"
                     st.markdown(f"<h3 style='color:lightgreen;'>Win Rate: {wr_val}</h3>", unsafe_allow_html=True)
                 
                 st.markdown("---")
                 
-                if not synergy_df.empty and card in synergy_df.columns:
-                    synergy_series = synergy_df[card].drop(labels=[card], errors='ignore')
-                    top_syns = synergy_series.sort_values(ascending=False).head(10).index.tolist()
-                    top_cnts = synergy_series.sort_values(ascending=True).head(10).index.tolist()
+                if stats and stats['synergies']:
+                    top_syns = [id_to_name[c] for c in stats['synergies'] if c in id_to_name]
+                    top_cnts = [id_to_name[c] for c in stats['counters'] if c in id_to_name]
 
                     st.markdown("#### 🔥 Top 10 Synergies")
                     s_cols = st.columns(5)
@@ -717,41 +922,63 @@ if st.session_state.editing_player is None:
     # ---------------- TAB 5 (OPTIMIZER) ----------------
     with tab_optimizer:
         st.markdown("<h2 style='text-align: center; color: #ffd700; text-shadow: 2px 2px #000;'>⚒️ Deck Optimizer Engine</h2>", unsafe_allow_html=True)
-        try:
-            with open("optimizer.html", "r", encoding="utf-8") as f:
-                opt_html = f.read()
-            
-            try:
-                with open("cards_i18n.json", "rb") as json_f:
-                    json_b64 = base64.b64encode(json_f.read()).decode("utf-8")
-                json_data_uri = f"data:application/json;base64,{json_b64}"
-                opt_html = opt_html.replace('"cards_i18n.json"', f'"{json_data_uri}"')
-                opt_html = opt_html.replace('"https://royaleapi.github.io/cr-api-data/json/cards_i18n.json"', f'"{json_data_uri}"')
-            except FileNotFoundError:
-                st.warning("⚠️ 'cards_i18n.json' not found locally.")
-            
-            try:
-                with open("synergy_datasetFinal.csv", "rb") as csv_f:
-                    csv_b64 = base64.b64encode(csv_f.read()).decode("utf-8")
-                csv_data_uri = f"data:text/csv;base64,{csv_b64}"
-                opt_html = opt_html.replace('"synergy_datasetFinal.csv"', f'"{csv_data_uri}"')
-            except FileNotFoundError:
-                st.warning("⚠️ 'synergy_datasetFinal.csv' not found locally.")
-
-            bg_b64 = get_base64_of_bin_file(LOCAL_BACKGROUND_IMAGE)
-            if bg_b64:
-                bg_data_uri = f"data:image/jpeg;base64,{bg_b64}"
-                opt_html = opt_html.replace('"newWallpaper1.jpg"', f'"{bg_data_uri}"')
-                opt_html = opt_html.replace('"foranalytics.jpg"', f'"{bg_data_uri}"')
-                
-            font_b64 = get_base64_of_bin_file(LOCAL_FONT_FILE)
-            if font_b64:
-                font_data_uri = f"data:font/opentype;base64,{font_b64}"
-                opt_html = opt_html.replace('"Clash_Regular.otf"', f'"{font_data_uri}"')
 
-            components.html(opt_html, height=1200, scrolling=True)
-        except Exception as e:
-            st.error(f"⚠️ Failed to load 'optimizer.html'. Error: {e}")
+        st.markdown("### 🚀 Multi-Swap Optimizer")
+        opt_col1, spacer_opt, opt_col2 = st.columns([0.35, 0.05, 0.60])
+        with opt_col1:
+            deck_sources = {"Player 1": st.session_state.deck1, "Player 2": st.session_state.deck2, "Opponent": st.session_state.deck3}
+            opt_source = st.selectbox("Deck to optimize", list(deck_sources))
+            opt_swaps = st.slider("Max card swaps", min_value=1, max_value=4, value=3)
+            opt_elixir = st.slider("Average elixir range", min_value=2.0, max_value=6.0, value=(2.0, 6.0), step=0.1)
+            opt_keep = st.checkbox("Keep win condition (Hog / Golem / Lava / Balloon / X-Bow)", value=True)
+            opt_rerank = st.checkbox(
+                "Re-rank with the Neural Network", value=oracle_model is not None, disabled=oracle_model is None,
+                help="Orders the best synergy decks by their predicted win rate against the meta pool."
+            )
+            if st.button("⚒️ OPTIMIZE DECK", type="primary", use_container_width=True):
+                source_deck = deck_sources[opt_source]
+                if len(source_deck) != 8:
+                    st.error(f"⚠️ The {opt_source} deck must have exactly 8 cards!")
+                else:
+                    opt_results, opt_msg = optimize_deck_synergy(source_deck, opt_swaps, opt_elixir, opt_keep, opt_rerank)
+                    if opt_results:
+                        st.session_state.optimizer_result = (list(source_deck), opt_results)
+                    else:
+                        st.session_state.pop('optimizer_result', None)
+                        st.error(opt_msg)
+
+        with opt_col2:
+            if 'optimizer_result' in st.session_state:
+                source_deck, opt_results = st.session_state.optimizer_result
+                best_deck, best_score, best_swaps, best_wr = opt_results[0]
+                start_score = deck_synergy(synergy_matrix, [synergy_card_pos[name] for name in source_deck])
+
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Deck Synergy", f"{best_score:.3f}", f"{best_score - start_score:+.3f}")
+                m2.metric("Cards Swapped", len(best_swaps))
+                m3.metric("NN Win Rate vs Meta", f"{best_wr*100:.1f}%" if best_wr is not None else "N/A")
+                for slot, card_out, card_in in best_swaps:
+                    st.markdown(f"🔁 Slot {slot + 1}: **{card_out}** ➜ **{card_in}**")
+                if not best_swaps:
+                    st.success("✨ This deck is already perfectly optimized!")
+                render_read_only_deck(best_deck)
+            else:
+                st.info("Pick a deck and click Optimize to search multi-card swaps on the server.")
+
+        st.markdown("---")
+        rerun_start = time.perf_counter()
+        with METRICS.span("optimizer_payload_serve"):
+            opt_payload = load_optimizer_payload(asset_signature(OPTIMIZER_ASSETS))
+        if opt_payload is None:
+            st.error("⚠️ Failed to load 'optimizer.html'.")
+        else:
+            for missing_file in opt_payload["missing"]:
+                st.warning(f"⚠️ '{missing_file}' not found locally.")
+            components.html(opt_payload["html"], height=1200, scrolling=True)
+            st.caption(
+                f"Payload {opt_payload['bytes'] / 1e6:.2f} MB · #{opt_payload['hash']} · "
+                f"composed in {opt_payload['build_ms']:.0f} ms · this rerun {(time.perf_counter() - rerun_start) * 1000:.1f} ms"
+            )
 
 else:
     # --- EDIT VIEW ---
@@ -807,19 +1034,16 @@ else:
                 st.image(get_img_url(card), use_container_width=True)
             with c2:
                 st.markdown(f"<h4 style='color:#ffd700; margin-bottom:10px;'>{card}</h4>", unsafe_allow_html=True)
-                win_rate = "N/A"
-                if not df_winrates.empty and card_id in df_winrates['Card_ID'].values:
-                    val = df_winrates.loc[df_winrates['Card_ID'] == card_id, 'Win_Rate'].values[0]
-                    win_rate = f"{val:.1f}%"
+                stats = card_stats.get(card_id)
+                win_rate = f"{stats['win_rate'] * 100:.1f}%" if stats and stats['win_rate'] is not None else "N/A"
                 st.markdown(f"**Win Rate:** <span style='color:lightgreen;'>{win_rate}</span><br>"
-                            f"**Elixir:** {card_dict[card].get('elixir', '?')}<br>"
-                            f"**Type:** {card_dict[card].get('type', '?')}", unsafe_allow_html=True)
+                            f"**Elixir:** {stats['elixir'] if stats else '?'}<br>"
+                            f"**Type:** {stats['type'] if stats else '?'}", unsafe_allow_html=True)
 
             st.markdown("---")
-            if not synergy_df.empty and card in synergy_df.columns:
-                synergy_series = synergy_df[card].drop(labels=[card], errors='ignore')
-                top_syn_names = synergy_series.sort_values(ascending=False).head(10).index.tolist()
-                top_counter_names = synergy_series.sort_values(ascending=True).head(10).index.tolist()
+            if stats and stats['synergies']:
+                top_syn_names = [id_to_name[c] for c in stats['synergies'] if c in id_to_name]
+                top_counter_names = [id_to_name[c] for c in stats['counters'] if c in id_to_name]
 
                 st.write("🔥 **Top 10 Synergies:**")
                 for row_idx in range(2):
@@ -844,7 +1068,10 @@ else:
                 
                 st.markdown("---")
                 st.write("📊 **Synergy Strength Breakdown**")
-                top_10_data = synergy_series.sort_values(ascending=False).head(10)
+                top_10_data = pd.Series(
+                    [score for c, score in zip(stats['synergies'], stats['synergy_scores']) if c in id_to_name],
+                    index=top_syn_names
+                )
                 fig = px.bar(top_10_data, x=top_10_data.values, y=top_10_data.index, orientation='h', color=top_10_data.values, color_continuous_scale='YlOrRd')
                 fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), height=240, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white', size=10, family="ClashFont, Arial, sans-serif"), xaxis=dict(showgrid=False, visible=False, fixedrange=True), yaxis=dict(title=None, fixedrange=True), dragmode=False)
                 fig.update_coloraxes(showscale=False)
@@ -876,3 +1103,49 @@ else:
                     if st.button("ℹ️ Info", key=f"inf_{card}", use_container_width=True):
                         st.session_state.viewed_card = card
                         st.rerun()
+
+# ==========================================
+# ENGINE METRICS (ADMIN)
+# ==========================================
+
+def render_metrics_panel():
+    snapshot = METRICS.snapshot()
+    st.markdown("### 📈 Engine Metrics")
+    spans = pd.DataFrame.from_dict(snapshot["spans_seconds"], orient="index")
+    if spans.empty:
+        st.caption("No engine calls recorded yet in this process.")
+    else:
+        latency_cols = ["mean", "p50", "p95", "p99", "max"]
+        spans[latency_cols] = spans[latency_cols] * 1000
+        st.write("⏱️ **Latency per engine (ms, recent calls)**")
+        st.dataframe(spans.rename(columns={c: f"{c} ms" for c in latency_cols}).round(2), use_container_width=True)
+
+    met_col1, met_col2 = st.columns(2)
+    with met_col1:
+        st.write("🗃️ **Cache hit rates**")
+        caches = pd.DataFrame.from_dict(snapshot["caches"], orient="index")
+        if not caches.empty:
+            st.dataframe(caches, use_container_width=True)
+    with met_col2:
+        st.write("📦 **Model batch sizes**")
+        batches = pd.DataFrame.from_dict(snapshot["batch_sizes"], orient="index")
+        if not batches.empty:
+            st.dataframe(batches.round(1), use_container_width=True)
+
+    if anti_meta_engine is not None:
+        pool_size = len(anti_meta_engine.meta_pool_5000)
+        st.caption(f"🃏 Meta pool: {anti_meta_engine.meta_guaranteed:,} of {pool_size:,} decks certainly in the true top "
+                   f"{pool_size:,}; deck counts overestimated by at most {anti_meta_engine.meta_max_error:,}.")
+
+    dl_col1, dl_col2 = st.columns(2)
+    dl_col1.download_button("⬇️ Prometheus text", METRICS.to_prometheus(), file_name="metrics.prom", use_container_width=True)
+    dl_col2.download_button("⬇️ JSON snapshot", METRICS.to_json(), file_name="metrics.json", use_container_width=True)
+
+if st.query_params.get("admin") == "1":
+    with st.expander("📈 Engine Metrics (admin)", expanded=True):
+        render_metrics_panel()
+
+if METRICS_PROM_FILE:
+    METRICS.write_prometheus(METRICS_PROM_FILE)
+if METRICS_JSON_LOG:
+    METRICS.append_json_log(METRICS_JSON_LOG)
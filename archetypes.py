@@ -0,0 +1,125 @@
+import numpy as np
+
+from battle_store import source_key
+from brackets import BRACKET_EDGES, battle_brackets
+
+# --- VECTORIZED DECK ARCHETYPES ---
+# Per-card lookup arrays over the battle encoding (elixir, type code, win-condition bit)
+# turn an (N, 8) uint8 deck matrix into elixir averages, type counts and archetype codes
+# with a handful of gathers and row sums. The rules are the Battle Predictor's, applied
+# in the same order (first match wins), so a deck gets the same label either way.
+ARCHETYPE_FILE = "archetype_matchups.npz"
+ARCHETYPES = ("Hog Cycle", "Golem Beatdown", "LavaLoon", "X-Bow Cycle", "Log Bait",
+              "Beatdown", "Cycle", "Siege", "Control")
+CARD_TYPES = ("Troop", "Spell", "Building")
+OTHER_TYPE = 255
+
+HOG_ID = 26000021
+GOLEM_ID = 26000009
+LAVA_ID = 26000029
+BALLOON_ID = 26000006
+X_BOW_ID = 27000008
+WIN_CONDITION_BITS = {HOG_ID: 1, GOLEM_ID: 2, LAVA_ID: 4, BALLOON_ID: 8, X_BOW_ID: 16}
+
+
+def card_lookup(card_ids, card_info):
+    # card_info: {card_id: {"elixir", "type"}}; cards missing from it count as 0-elixir troops
+    info = [card_info.get(int(c), {}) for c in card_ids]
+    types = [card.get("type", "Troop") for card in info]
+    return {
+        "elixir": np.array([card.get("elixir", 0) for card in info], dtype=np.uint8),
+        "type": np.array([CARD_TYPES.index(t) if t in CARD_TYPES else OTHER_TYPE for t in types], dtype=np.uint8),
+        "win_condition": np.array([WIN_CONDITION_BITS.get(int(c), 0) for c in card_ids], dtype=np.uint8),
+    }
+
+
+def classify_chunk(decks, lookup):
+    decks = np.asarray(decks)
+    elixir = lookup["elixir"][decks]
+    types = lookup["type"][decks]
+    present = np.bitwise_or.reduce(lookup["win_condition"][decks], axis=1)
+    has = {card: (present & bit) > 0 for card, bit in WIN_CONDITION_BITS.items()}
+
+    avg = elixir.sum(axis=1, dtype=np.int64) / 8
+    heavy = (elixir >= 5).sum(axis=1)
+    cheap = (elixir <= 2).sum(axis=1)
+    troops, spells, buildings = ((types == code).sum(axis=1) for code in range(len(CARD_TYPES)))
+
+    rules = [
+        has[HOG_ID] & (avg <= 3.3),
+        has[GOLEM_ID] & (avg >= 4.0),
+        has[LAVA_ID] & has[BALLOON_ID],
+        has[X_BOW_ID] & (buildings >= 1),
+        (cheap >= 3) & (spells >= 2) & (avg <= 3.5),
+        (avg >= 3.9) & (heavy >= 2),
+        (avg <= 3.4) & (cheap >= 2),
+        (buildings >= 1) & (avg <= 3.6),
+    ]
+    archetype = np.select(rules, range(len(rules)), default=ARCHETYPES.index("Control"))
+    return {
+        "avg_elixir": avg.astype(np.float32),
+        "troops": troops.astype(np.uint8),
+        "spells": spells.astype(np.uint8),
+        "buildings": buildings.astype(np.uint8),
+        "archetype": archetype.astype(np.uint8),
+    }
+
+
+# --- ARCHETYPE x ARCHETYPE WIN RATES ---
+def archetype_matchups(battles, lookup, edges=BRACKET_EDGES, chunk_size=1_000_000):
+    # wins[b, x, y] / matches[b, x, y]: how archetype x did against archetype y in trophy
+    # bracket b, both perspectives combined (mirror matches count once per side).
+    # One bincount per chunk over (bracket, archetype, archetype) keys.
+    n_arch, n_brackets = len(ARCHETYPES), len(edges) + 1
+    size = n_brackets * n_arch * n_arch
+    wins = np.zeros(size, dtype=np.int64)
+    matches = np.zeros(size, dtype=np.int64)
+
+    for start in range(0, len(battles["p1_decks"]), chunk_size):
+        stop = start + chunk_size
+        a1 = classify_chunk(battles["p1_decks"][start:stop], lookup)["archetype"].astype(np.int64)
+        a2 = classify_chunk(battles["p2_decks"][start:stop], lookup)["archetype"].astype(np.int64)
+        bracket = battle_brackets(battles["trophies1"][start:stop], battles["trophies2"][start:stop], edges)
+        p1_won = np.asarray(battles["crowns1"][start:stop]) > np.asarray(battles["crowns2"][start:stop])
+
+        base = bracket.astype(np.int64) * n_arch
+        p1_keys, p2_keys = (base + a1) * n_arch + a2, (base + a2) * n_arch + a1
+        keys = np.concatenate([p1_keys, p2_keys])
+        matches += np.bincount(keys, minlength=size)
+        wins += np.bincount(keys, weights=np.concatenate([p1_won, ~p1_won]), minlength=size).astype(np.int64)
+
+    shape = (n_brackets, n_arch, n_arch)
+    return wins.reshape(shape), matches.reshape(shape)
+
+
+def archetype_win_rates(wins, matches):
+    # NaN where two archetypes never met
+    return np.divide(wins, matches, out=np.full(np.shape(wins), np.nan), where=np.asarray(matches) > 0)
+
+
+def save_archetype_matchups(wins, matches, card_ids, n_battles, path=ARCHETYPE_FILE, edges=BRACKET_EDGES,
+                            source=None):
+    np.savez_compressed(
+        path, wins=wins, matches=matches, archetypes=np.array(ARCHETYPES),
+        card_ids=np.asarray(card_ids, dtype=np.int64), n_battles=np.int64(n_battles),
+        edges=np.asarray(edges, dtype=np.int64), source=np.array(source_key(source))
+    )
+
+
+def load_archetype_matchups(path=ARCHETYPE_FILE, card_ids=None, n_battles=None, edges=BRACKET_EDGES, source=None):
+    # (wins, matches) per bracket; None when missing or built from other battles (archive
+    # signature, vocabulary or size) or rules
+    try:
+        with np.load(path) as data:
+            stored = {name: data[name] for name in data.files}
+    except FileNotFoundError:
+        return None
+    if tuple(stored["archetypes"]) != ARCHETYPES or not np.array_equal(stored["edges"], edges):
+        return None
+    if source is not None and str(stored.get("source", "")) != source_key(source):
+        return None
+    if card_ids is not None and not np.array_equal(stored["card_ids"], card_ids):
+        return None
+    if n_battles is not None and int(stored["n_battles"]) != n_battles:
+        return None
+    return stored["wins"], stored["matches"]
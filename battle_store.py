@@ -0,0 +1,201 @@
+import os
+import json
+import shutil
+import zipfile
+import pickle
+import numpy as np
+import pandas as pd
+
+# --- RAW BATTLE ARCHIVE LAYOUT ---
+BATTLE_ARCHIVE = "20231106.zip"
+BATTLE_STORE_DIR = "battle_store"
+CARD_MAPPING_FILE = "card_mapping.pkl"
+
+BATTLE_COLUMNS = [
+    "temp1", "temp2", "id1", "Trophies1", "Crowns1",
+    "Card1-1", "Card1-2", "Card1-3", "Card1-4", "Card1-5", "Card1-6", "Card1-7", "Card1-8",
+    "id2", "Trophies2", "Crowns2",
+    "Card2-1", "Card2-2", "Card2-3", "Card2-4", "Card2-5", "Card2-6", "Card2-7", "Card2-8"
+]
+P1_CARD_COLUMNS = [f'Card1-{i}' for i in range(1, 9)]
+P2_CARD_COLUMNS = [f'Card2-{i}' for i in range(1, 9)]
+
+# Arrays written to the store, one .npy file each
+STORE_ARRAYS = ["card_ids", "p1_decks", "p2_decks", "crowns1", "crowns2", "trophies1", "trophies2"]
+
+
+def load_card_vocab(mapping_file=CARD_MAPPING_FILE):
+    # Raw card ids ordered by their model index, so encoded ids == NN input ids
+    try:
+        with open(mapping_file, 'rb') as f:
+            card_to_idx = pickle.load(f)
+    except FileNotFoundError:
+        return np.array([], dtype=np.int64)
+    return np.array(sorted(card_to_idx, key=card_to_idx.get), dtype=np.int64)
+
+
+def read_battle_archive(archive=BATTLE_ARCHIVE):
+    # `archive` may be a path (.zip/.csv) or a file-like object holding CSV rows
+    dataset = pd.read_csv(archive, header=None)
+    dataset.columns = BATTLE_COLUMNS
+    dataset.drop(["temp1", "temp2", "id1", "id2"], axis=1, inplace=True, errors='ignore')
+    dataset.dropna(inplace=True)
+    return dataset
+
+
+def iter_archive_chunks(archive=BATTLE_ARCHIVE, chunk_bytes=64 << 20):
+    # Raw CSV text in blocks of whole lines, so parsing can happen elsewhere
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            with zf.open(zf.namelist()[0]) as f:
+                yield from _iter_line_blocks(f, chunk_bytes)
+    else:
+        with open(archive, "rb") as f:
+            yield from _iter_line_blocks(f, chunk_bytes)
+
+
+def _iter_line_blocks(f, chunk_bytes):
+    while True:
+        lines = f.readlines(chunk_bytes)
+        if not lines:
+            return
+        yield b"".join(lines)
+
+
+def encode_card_ids(raw_ids, card_ids):
+    # Vectorized raw id -> uint8 index lookup against the vocabulary
+    order = np.argsort(card_ids)
+    pos = np.searchsorted(card_ids, raw_ids, sorter=order)
+    return order[pos].astype(np.uint8)
+
+
+def encode_battles(dataset, card_ids=None):
+    if card_ids is None:
+        card_ids = load_card_vocab()
+
+    p1_raw = dataset[P1_CARD_COLUMNS].to_numpy(dtype=np.int64)
+    p2_raw = dataset[P2_CARD_COLUMNS].to_numpy(dtype=np.int64)
+
+    # Cards seen in battle but missing from the model mapping go after the known ones
+    seen = np.union1d(np.unique(p1_raw), np.unique(p2_raw))
+    extra = np.setdiff1d(seen, card_ids)
+    card_ids = np.concatenate([card_ids, extra]).astype(np.int64)
+    if len(card_ids) > 255:
+        raise ValueError(f"{len(card_ids)} distinct cards do not fit in a uint8 encoding.")
+
+    return {
+        "card_ids": card_ids,
+        "p1_decks": encode_card_ids(p1_raw, card_ids),
+        "p2_decks": encode_card_ids(p2_raw, card_ids),
+        "crowns1": dataset['Crowns1'].to_numpy(dtype=np.uint8),
+        "crowns2": dataset['Crowns2'].to_numpy(dtype=np.uint8),
+        "trophies1": dataset['Trophies1'].to_numpy(dtype=np.uint16),
+        "trophies2": dataset['Trophies2'].to_numpy(dtype=np.uint16),
+    }
+
+
+# --- ON-DISK COLUMNAR STORE ---
+# meta.json records the archive the store was built from (name, size, mtime), so a
+# replaced archive (a new day under the same name) is re-encoded instead of served stale.
+def archive_signature(archive):
+    try:
+        stat = os.stat(archive)
+    except FileNotFoundError:
+        return None
+    return {"name": os.path.basename(archive), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def source_key(source):
+    # An archive_signature as stored in the .npz tables built from the battles ("" when unknown)
+    return "" if source is None else json.dumps(source, sort_keys=True)
+
+
+def write_store(battles, store_dir=BATTLE_STORE_DIR, source=None):
+    os.makedirs(store_dir, exist_ok=True)
+    for name in STORE_ARRAYS:
+        np.save(os.path.join(store_dir, f"{name}.npy"), np.ascontiguousarray(battles[name]))
+    meta = {
+        "source": source,
+        "n_battles": int(len(battles["p1_decks"])),
+        "n_cards": int(len(battles["card_ids"])),
+    }
+    with open(os.path.join(store_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def build_store(archive=BATTLE_ARCHIVE, store_dir=BATTLE_STORE_DIR):
+    battles = encode_battles(read_battle_archive(archive))
+    return write_store(battles, store_dir, source=archive_signature(archive))
+
+
+def store_exists(store_dir=BATTLE_STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, "meta.json"))
+
+
+def store_source(store_dir=BATTLE_STORE_DIR):
+    try:
+        with open(os.path.join(store_dir, "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("source")
+    except FileNotFoundError:
+        return None
+
+
+def store_is_current(store_dir=BATTLE_STORE_DIR, archive=BATTLE_ARCHIVE):
+    # A store built from this archive as it is now; with no archive around (a deployment
+    # shipping only the store) any store is served
+    if not store_exists(store_dir):
+        return False
+    signature = archive_signature(archive)
+    return signature is None or store_source(store_dir) == signature
+
+
+def open_store(store_dir=BATTLE_STORE_DIR):
+    # Memory-mapped, nothing is parsed or copied until a page is touched
+    return {
+        name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode='r')
+        for name in STORE_ARRAYS
+    }
+
+
+def publish_store(battles, store_dir=BATTLE_STORE_DIR, source=None):
+    # Written under a private name and renamed into place, so concurrent processes never
+    # see a half-written store; the first rename wins and the others drop their copy.
+    # A store from another archive is swapped out (open memmaps keep the old files).
+    tmp_dir = f"{store_dir}.tmp-{os.getpid()}"
+    write_store(battles, tmp_dir, source)
+    try:
+        os.rename(tmp_dir, store_dir)
+        return
+    except OSError:
+        pass
+    if store_source(store_dir) != source:
+        stale_dir = f"{store_dir}.stale-{os.getpid()}"
+        try:
+            os.rename(store_dir, stale_dir)
+            os.rename(tmp_dir, store_dir)
+        except OSError:
+            pass
+        shutil.rmtree(stale_dir, ignore_errors=True)
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if not store_exists(store_dir):
+        raise OSError(f"Could not publish the battle store to '{store_dir}'.")
+
+
+def load_battles(archive=BATTLE_ARCHIVE, store_dir=BATTLE_STORE_DIR, persist=False):
+    # Prefer the prebuilt store while it matches the archive; else parse the raw zip. With
+    # `persist` the parsed battles become (or replace) the store first and are served
+    # memory-mapped like a prebuilt one.
+    if store_is_current(store_dir, archive):
+        return open_store(store_dir)
+    try:
+        battles = encode_battles(read_battle_archive(archive))
+    except FileNotFoundError:
+        return None
+    if persist:
+        try:
+            publish_store(battles, store_dir, source=archive_signature(archive))
+            return open_store(store_dir)
+        except OSError:
+            pass  # read-only deployment: serve the in-memory copy
+    return battles
@@ -0,0 +1,71 @@
+import argparse
+import time
+import numpy as np
+
+from anti_meta import global_win_rates, tally_card_wins
+from benchmarks.synthetic_battles import N_CARDS, random_decks
+
+# Per-card loop aggregation vs single-pass bincount, on random decks.
+#   python -m benchmarks.bench_aggregation --sizes 1000000 10000000
+
+
+def loop_global_win_rates(p1_decks, p2_decks, p1_won):
+    p2_won = 1 - p1_won
+    global_wr = {}
+    for card in np.unique(p1_decks):
+        p1_mask = (p1_decks == card).any(axis=1)
+        p2_mask = (p2_decks == card).any(axis=1)
+        matches = p1_mask.sum() + p2_mask.sum()
+        wins = p1_won[p1_mask].sum() + p2_won[p2_mask].sum()
+        global_wr[card] = wins / (matches + 1e-9)
+    return global_wr
+
+
+def loop_counter_tally(vs_decks, vs_wins):
+    card_matches = {}
+    card_wins = {}
+    for i in range(8):
+        for card, win in zip(vs_decks[:, i], vs_wins):
+            card_matches[card] = card_matches.get(card, 0) + 1
+            card_wins[card] = card_wins.get(card, 0) + win
+    return card_wins, card_matches
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(n_battles, seed=0):
+    rng = np.random.default_rng(seed)
+    p1_decks = random_decks(n_battles, rng)
+    p2_decks = random_decks(n_battles, rng)
+    p1_won = rng.integers(0, 2, size=n_battles)
+
+    loop_wr, t_loop_wr = timed(loop_global_win_rates, p1_decks, p2_decks, p1_won)
+    (seen, rates), t_vec_wr = timed(global_win_rates, p1_decks, p2_decks, p1_won, N_CARDS)
+    assert np.allclose([loop_wr[c] for c in seen], rates)
+
+    # Decks that faced card 0 (from either side) and whether they won
+    holder1, holder2 = (p1_decks == 0).any(axis=1), (p2_decks == 0).any(axis=1)
+    vs_decks = np.concatenate([p2_decks[holder1], p1_decks[holder2]])
+    vs_wins = np.concatenate([1 - p1_won[holder1], p1_won[holder2]])
+    (loop_wins, loop_matches), t_loop_tally = timed(loop_counter_tally, vs_decks, vs_wins)
+    (wins, matches), t_vec_tally = timed(tally_card_wins, vs_decks, vs_wins, N_CARDS)
+    assert all(matches[c] == m and wins[c] == loop_wins[c] for c, m in loop_matches.items())
+
+    print(f"{n_battles:>12,} | global_wr  loop {t_loop_wr:8.3f}s  bincount {t_vec_wr:7.3f}s  x{t_loop_wr / t_vec_wr:6.1f}")
+    print(f"{'':>12} | counters   loop {t_loop_tally:8.3f}s  bincount {t_vec_tally:7.3f}s  x{t_loop_tally / t_vec_tally:6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Anti-Meta win-rate aggregation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+    for n_battles in args.sizes:
+        run(n_battles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_battles import write_synthetic_archive
+
+# End-to-end benchmarks of the app's engines on synthetic archives: engine load, the
+# Anti-Meta Engine, the Oracle, deck metadata and the Battle Predictor path, with peak
+# memory. Each size runs in a fresh interpreter that imports app.py in Streamlit's bare
+# mode from a scratch directory holding the synthetic 20231106.zip (plus the prebuilt
+# store, trophy brackets, archetype table and meta matrix unless --raw). Results go to one JSON file per run so
+# releases can be compared.
+#   python -m benchmarks.bench_app --rows 100000 1000000 10000000 --out bench_results.json
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_ASSETS = [
+    "cards_i18n.json", "card_mapping.pkl", "clash_royale_nn_weights.npz", "clash_royale_nn_model.keras",
+    "synergy_datasetFinal.csv", "card_win_rates(1).csv", "card_analytics_df.csv", "optimizer.html",
+    "wallpape.jpeg", "logo.png", "Clash_Regular.otf",
+]
+
+CHILD = r"""
+import json, resource, sys, time, tracemalloc
+import numpy as np
+sys.path.insert(0, sys.argv[1])
+repeat = int(sys.argv[2])
+results = {}
+
+def measure(name, fn, runs=repeat):
+    # Timings untraced, then one traced call for the peak Python/NumPy allocation
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - start) * 1e3)
+    tracemalloc.start()
+    fn(runs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = np.array(times)
+    results[name] = {
+        "runs": runs, "mean_ms": float(times.mean()), "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)), "min_ms": float(times.min()), "peak_alloc_mb": peak / 2**20,
+    }
+
+start = time.perf_counter()
+import app
+results["app_import"] = {"runs": 1, "mean_ms": (time.perf_counter() - start) * 1e3}
+
+measure("engine_load", lambda i: (app.load_anti_meta_engine.clear(), app.load_anti_meta_engine()), runs=3)
+# What every rerun pays once the engine is cached
+measure("engine_cached", lambda i: app.load_anti_meta_engine())
+
+rng = np.random.default_rng(0)
+cards = [int(c) for c in app.battle_card_ids]
+measure("get_hate_card_counter", lambda i: app.get_hate_card_counter(cards[i % len(cards)]))
+
+# Fresh opponent decks every call so the per-deck memo never answers
+pool = app.meta_pool_5000[1000:] if len(app.meta_pool_5000) > 1000 else app.meta_pool_5000
+opponents = [pool[j] for j in rng.permutation(len(pool))]
+measure("recommend_counter_deck", lambda i: app.recommend_counter_deck(opponents[i % len(opponents)]))
+# Opponents from the Oracle's own pool: a row of the prebuilt meta matrix when there is one
+pool_opponents = [app.meta_pool_1000[j] for j in rng.permutation(len(app.meta_pool_1000))]
+measure("recommend_counter_deck_pool", lambda i: app.recommend_counter_deck(pool_opponents[i % len(pool_opponents)]))
+measure("recommend_counter_deck_search_0.5s",
+        lambda i: app.recommend_counter_deck(opponents[-1 - i], search_budget=0.5), runs=3)
+
+names = [[app.id_to_name[c] for c in deck if c in app.id_to_name] for deck in opponents]
+names = [deck for deck in names if len(deck) == 8]
+measure("get_deck_metadata", lambda i: app.get_deck_metadata(names[i % len(names)]))
+
+def predict(i, cache=None):
+    # The PREDICT WINNER button path: names -> raw ids -> model ids -> cached model call
+    p1_ids = [app.name_to_id[n] for n in names[i % len(names)]]
+    p2_ids = [app.name_to_id[n] for n in names[(i * 7 + 1) % len(names)]]
+    p1_mapped = [app.card_to_idx.get(c, 0) if c > 500 else c for c in p1_ids]
+    p2_mapped = [app.card_to_idx.get(c, 0) if c > 500 else c for c in p2_ids]
+    cache = cache if cache is not None else app.get_matchup_prediction_cache()
+    return app.cached_matchup_probability(cache, app.oracle_model, p1_mapped, p2_mapped)
+
+from prediction_cache import LRUCache
+measure("battle_predictor_cold", lambda i: predict(i, LRUCache()))
+measure("battle_predictor_warm", lambda i: predict(0))
+
+print(json.dumps({
+    "n_battles": app.anti_meta_engine.n_battles if app.anti_meta_engine is not None else None,
+    "results": results,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def prepare_workdir(archive, prebuild):
+    # Scratch app directory: repo assets symlinked, synthetic archive as 20231106.zip
+    workdir = tempfile.mkdtemp(prefix="bench_app_")
+    for name in APP_ASSETS:
+        if os.path.exists(os.path.join(REPO_DIR, name)):
+            os.symlink(os.path.join(REPO_DIR, name), os.path.join(workdir, name))
+    os.symlink(os.path.abspath(archive), os.path.join(workdir, "20231106.zip"))
+
+    setup = {}
+    if prebuild:
+        for step in ("store", "brackets", "archetypes", "meta-matrix"):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(REPO_DIR, "build.py"), step],
+                           cwd=workdir, check=True, capture_output=True)
+            setup[f"build_{step}_s"] = time.perf_counter() - start
+    return workdir, setup
+
+
+def run_size(n_rows, data_dir, repeat, prebuild):
+    os.makedirs(data_dir, exist_ok=True)
+    archive = os.path.join(data_dir, f"synthetic_{n_rows}.zip")
+    setup = {}
+    if not os.path.exists(archive):
+        start = time.perf_counter()
+        write_synthetic_archive(archive, n_rows)
+        setup["generate_s"] = time.perf_counter() - start
+
+    workdir, build_setup = prepare_workdir(archive, prebuild)
+    setup.update(build_setup)
+    try:
+        out = subprocess.run([sys.executable, "-c", CHILD, REPO_DIR, str(repeat)],
+                             cwd=workdir, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if out.returncode != 0:
+        print(f"{n_rows:,} rows: failed\n{out.stderr.strip().splitlines()[-1]}")
+        return None
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    return {"rows": n_rows, "prebuilt": prebuild, "setup": setup, **result}
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's engines on synthetic battle archives.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per operation.")
+    parser.add_argument("--raw", action="store_true", help="Parse the zip at startup instead of a prebuilt store.")
+    parser.add_argument("--data-dir", default="bench_data", help="Where generated archives are cached.")
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args()
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runs": [],
+    }
+    for n_rows in args.rows:
+        run = run_size(n_rows, args.data_dir, args.repeat, prebuild=not args.raw)
+        if run is None:
+            continue
+        report["runs"].append(run)
+        print(f"{n_rows:>12,} rows | rss {run['peak_rss_mb']:8.1f}MB | setup "
+              + "  ".join(f"{k} {v:.1f}" for k, v in run["setup"].items()))
+        for name, r in run["results"].items():
+            peak = f"  alloc {r['peak_alloc_mb']:7.1f}MB" if "peak_alloc_mb" in r else ""
+            p95 = f"  p95 {r['p95_ms']:9.2f}ms" if "p95_ms" in r else ""
+            print(f"{'':>12} | {name:<36} mean {r['mean_ms']:9.2f}ms{p95}{peak}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
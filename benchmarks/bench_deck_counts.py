@@ -0,0 +1,47 @@
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+from deck_masks import deck_masks, count_unique_masks, top_decks, masks_to_decks
+from benchmarks.synthetic_battles import skewed_decks
+
+# Winning-deck frequency counting: tuple(sorted(row)) + Counter vs 128-bit masks + np.unique.
+#   python -m benchmarks.bench_deck_counts --sizes 1000000 5000000
+
+
+def counter_top(decks, k):
+    return Counter(tuple(sorted(row)) for row in decks).most_common(k)
+
+
+def mask_top(decks, k):
+    masks, counts = count_unique_masks(deck_masks(decks))
+    top_masks, top_counts = top_decks(masks, counts, k)
+    return masks_to_decks(top_masks), top_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark winning-deck frequency counting.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--top", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n_decks in args.sizes:
+        decks = skewed_decks(n_decks, rng)
+
+        start = time.perf_counter()
+        expected = counter_top(decks, args.top)
+        t_counter = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, counts = mask_top(decks, args.top)
+        t_masks = time.perf_counter() - start
+
+        assert counts.tolist() == [count for _, count in expected]
+        print(f"{n_decks:>12,} decks | Counter {t_counter:7.3f}s  masks {t_masks:7.3f}s  x{t_counter / t_masks:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# Startup time, peak RSS and latency of the NumPy vs Keras Oracle backends.
+# Each backend runs in a fresh interpreter so imports and RSS are not shared.
+#   python -m benchmarks.bench_inference
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+import numpy as np
+from oracle_engine import NumpyOracle, KerasOracle
+if sys.argv[1] == "keras":
+    import tensorflow as tf
+    oracle = KerasOracle(tf.keras.models.load_model("clash_royale_nn_model.keras"))
+else:
+    oracle = NumpyOracle.load()
+startup = time.perf_counter() - start
+
+rng = np.random.default_rng(0)
+decks1 = np.argsort(rng.random((10_000, 110)), axis=1)[:, :8]
+decks2 = np.argsort(rng.random((10_000, 110)), axis=1)[:, :8]
+oracle.predict_pairs(decks1[:1], decks2[:1])
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+result = {
+    "backend": sys.argv[1],
+    "startup_s": startup,
+    "single_pair_ms": best_of(lambda: oracle.predict_pairs(decks1[:1], decks2[:1])) * 1e3,
+    "batch_10k_ms": best_of(lambda: oracle.predict_pairs(decks1, decks2)) * 1e3,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}
+if sys.argv[1] == "keras":
+    reference = NumpyOracle.load().predict_pairs(decks1, decks2)
+    result["max_abs_diff_vs_numpy"] = float(np.abs(oracle.predict_pairs(decks1, decks2) - reference).max())
+print(json.dumps(result))
+"""
+
+
+def run_backend(backend):
+    out = subprocess.run([sys.executable, "-c", CHILD, backend], capture_output=True, text=True)
+    if out.returncode != 0:
+        print(f"{backend}: failed\n{out.stderr.strip().splitlines()[-1]}")
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Oracle inference backends.")
+    parser.add_argument("--backends", nargs="+", default=["numpy", "keras"])
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        result = run_backend(backend)
+        if result is None:
+            continue
+        line = (f"{backend:>6} | startup {result['startup_s']:6.2f}s  rss {result['peak_rss_mb']:7.1f}MB  "
+                f"1 pair {result['single_pair_ms']:7.2f}ms  10k pairs {result['batch_10k_ms']:7.2f}ms")
+        if "max_abs_diff_vs_numpy" in result:
+            line += f"  max|diff| {result['max_abs_diff_vs_numpy']:.1e}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+import time
+
+from battle_store import BATTLE_ARCHIVE
+from ingest import aggregate_archive
+
+# Streaming chunked ingestion throughput at several process-pool sizes.
+#   python -m benchmarks.bench_ingest --archive 20231106.zip --workers 1 2 4 8
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel chunked battle ingestion.")
+    parser.add_argument("--archive", default=BATTLE_ARCHIVE)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        agg = aggregate_archive(args.archive, workers=workers, chunk_bytes=args.chunk_mb << 20)
+        elapsed = time.perf_counter() - start
+        rows_per_sec = int(agg["n_battles"]) / elapsed
+        baseline = baseline or rows_per_sec
+        print(f"{workers:>2} workers | {int(agg['n_battles']):,} rows in {elapsed:6.2f}s | "
+              f"{rows_per_sec:12,.0f} rows/s | x{rows_per_sec / baseline:4.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import io
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from battle_store import BATTLE_COLUMNS, load_card_vocab
+
+# Synthetic battle archives in the exact 24-column layout of the daily dumps, so the
+# engine and the benchmarks can run at any size without the real data.
+#   python -m benchmarks.synthetic_battles --rows 1000000 --out synthetic_1m.zip
+# Decks follow a Zipf popularity over a fixed set of archetypes (so meta pools and
+# counters look like real data), each card has a hidden strength that tilts the
+# winner, and a small share of rows has a missing card so dropna() is exercised.
+N_CARDS = 110
+
+
+def random_decks(n_battles, rng, n_cards=N_CARDS):
+    # 8 distinct cards per deck: a random start walked with a small stride
+    start = rng.integers(0, n_cards, size=(n_battles, 1))
+    stride = rng.integers(1, 14, size=(n_battles, 1))
+    return ((start + stride * np.arange(8)) % n_cards).astype(np.uint8)
+
+
+def skewed_decks(n_decks, rng, n_archetypes=20_000, n_cards=N_CARDS):
+    # Popular decks repeat often, card order inside each deck is shuffled
+    archetypes = np.argsort(rng.random((n_archetypes, n_cards), dtype=np.float32), axis=1)[:, :8]
+    picks = np.minimum(rng.zipf(1.3, size=n_decks) - 1, n_archetypes - 1)
+    decks = archetypes[picks]
+    return np.take_along_axis(decks, np.argsort(rng.random((n_decks, 8)), axis=1), axis=1).astype(np.uint8)
+
+
+def synthetic_battles(n_rows, rng, card_ids, n_archetypes=20_000, missing_rate=0.001):
+    # One DataFrame chunk with BATTLE_COLUMNS; card columns hold raw card ids
+    n_cards = len(card_ids)
+    p1 = skewed_decks(n_rows, rng, n_archetypes, n_cards)
+    p2 = skewed_decks(n_rows, rng, n_archetypes, n_cards)
+
+    strength = np.random.default_rng(12345).normal(0, 0.05, n_cards)
+    edge = strength[p1].sum(axis=1) - strength[p2].sum(axis=1)
+    p1_won = rng.random(n_rows) < 1 / (1 + np.exp(-edge))
+    winner_crowns = rng.integers(1, 4, n_rows)
+    loser_crowns = np.floor(rng.random(n_rows) * winner_crowns).astype(np.int64)
+
+    trophies1 = rng.integers(4000, 9000, n_rows)
+    columns = {
+        "temp1": "2023-11-06",
+        "temp2": 72000006,
+        "id1": "#P1",
+        "Trophies1": trophies1,
+        "Crowns1": np.where(p1_won, winner_crowns, loser_crowns),
+        **{f"Card1-{i + 1}": pd.array(card_ids[p1[:, i]], dtype="Int64") for i in range(8)},
+        "id2": "#P2",
+        "Trophies2": trophies1 + rng.integers(-200, 200, n_rows),
+        "Crowns2": np.where(p1_won, loser_crowns, winner_crowns),
+        **{f"Card2-{i + 1}": pd.array(card_ids[p2[:, i]], dtype="Int64") for i in range(8)},
+    }
+    frame = pd.DataFrame(columns, columns=BATTLE_COLUMNS)
+    frame.loc[rng.random(n_rows) < missing_rate, "Card1-1"] = pd.NA
+    return frame
+
+
+def battles_to_csv(frame):
+    # Arrow's writer (shipped with streamlit) is ~10x faster than DataFrame.to_csv here
+    out = io.BytesIO()
+    options = pa_csv.WriteOptions(include_header=False, quoting_style="none")
+    pa_csv.write_csv(pa.Table.from_pandas(frame, preserve_index=False), out, options)
+    return out.getvalue()
+
+
+def write_synthetic_archive(path, n_rows, seed=0, chunk_rows=500_000, card_ids=None):
+    # Streams chunks into a single-CSV zip, so 10M+ rows never sit in memory at once
+    card_ids = load_card_vocab() if card_ids is None else np.asarray(card_ids)
+    if len(card_ids) == 0:
+        card_ids = np.arange(26000000, 26000000 + N_CARDS, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        with zf.open("battles.csv", "w", force_zip64=True) as f:
+            for start in range(0, n_rows, chunk_rows):
+                chunk = synthetic_battles(min(chunk_rows, n_rows - start), rng, card_ids)
+                f.write(battles_to_csv(chunk))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic battle archive.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--out", default="synthetic_battles.zip")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_synthetic_archive(args.out, args.rows, args.seed)
+    print(f"Wrote {args.rows:,} synthetic battles to '{args.out}' in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import numpy as np
+
+from battle_store import source_key
+from ingest import DECK_SUMMARY_KEYS, aggregate_battles
+
+# --- TROPHY-BRACKET SEGMENTS ---
+# Each battle is bucketed once by the mean trophies of its two players (matchmaking keeps
+# them close). Rows of bracket b are rows[offsets[b]:offsets[b + 1]], and every bracket is
+# reduced to its own aggregate (see ingest.aggregate_battles, pair tables left out), so a
+# bracket-filtered query reads the same small tables as an unfiltered one. The whole day's
+# winning decks get their own summary: merging truncated bracket summaries would only
+# approximate the full-day meta pool that one exact pass gives.
+BRACKET_EDGES = (5000, 6000, 7000, 8000)
+BRACKET_FILE = "bracket_aggregates.npz"
+BRACKET_TABLES = ("card_wins", "card_matches", "matchup_wins", "matchup_matches")
+
+
+def bracket_labels(edges=BRACKET_EDGES):
+    return ([f"< {edges[0]:,}"] + [f"{lo:,}–{hi - 1:,}" for lo, hi in zip(edges, edges[1:])]
+            + [f"{edges[-1]:,}+"])
+
+
+def battle_brackets(trophies1, trophies2, edges=BRACKET_EDGES):
+    mean_trophies = (np.asarray(trophies1, dtype=np.int32) + np.asarray(trophies2, dtype=np.int32)) // 2
+    return np.searchsorted(np.asarray(edges), mean_trophies, side='right').astype(np.uint8)
+
+
+def bracket_rows(brackets, n_brackets):
+    # CSR layout: battle rows grouped by bracket, original order kept inside a bracket
+    rows = np.argsort(brackets, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(brackets, minlength=n_brackets))]).astype(np.int64)
+    return rows, offsets
+
+
+def bracket_aggregates(battles, edges=BRACKET_EDGES):
+    # One aggregate per bracket, lowest first; works on the memory-mapped store
+    brackets = battle_brackets(battles["trophies1"], battles["trophies2"], edges)
+    rows, offsets = bracket_rows(brackets, len(edges) + 1)
+    aggregates = []
+    for b in range(len(edges) + 1):
+        selected = rows[offsets[b]:offsets[b + 1]]
+        subset = {name: np.asarray(battles[name])[selected] for name in ("p1_decks", "p2_decks", "crowns1", "crowns2")}
+        aggregates.append(aggregate_battles(dict(subset, card_ids=battles["card_ids"]), pair_tables=False))
+    return aggregates
+
+
+def save_bracket_aggregates(aggregates, day_summary, path=BRACKET_FILE, edges=BRACKET_EDGES, source=None):
+    # Tables stacked on a leading bracket axis, deck masks concatenated with offsets,
+    # the full-day deck summary under day_*, the archive's signature under source
+    deck_sizes = [len(agg["deck_counts"]) for agg in aggregates]
+    np.savez_compressed(
+        path,
+        source=np.array(source_key(source)),
+        **{f"day_{name}": day_summary[key] for key, name in DECK_SUMMARY_KEYS.items()},
+        card_ids=np.asarray(aggregates[0]["card_ids"], dtype=np.int64),
+        edges=np.asarray(edges, dtype=np.int64),
+        n_battles=np.array([agg["n_battles"] for agg in aggregates], dtype=np.int64),
+        deck_masks=np.concatenate([agg["deck_masks"] for agg in aggregates]),
+        deck_counts=np.concatenate([agg["deck_counts"] for agg in aggregates]),
+        deck_errors=np.concatenate([agg["deck_errors"] for agg in aggregates]),
+        deck_floor=np.array([agg["deck_floor"] for agg in aggregates], dtype=np.int64),
+        deck_total=np.array([agg["deck_total"] for agg in aggregates], dtype=np.int64),
+        deck_offsets=np.concatenate([[0], np.cumsum(deck_sizes)]).astype(np.int64),
+        **{name: np.stack([agg[name] for agg in aggregates]) for name in BRACKET_TABLES}
+    )
+
+
+def load_bracket_aggregates(path=BRACKET_FILE, card_ids=None, n_battles=None, edges=BRACKET_EDGES, source=None):
+    # (bracket aggregates, full-day deck summary); None when missing or built from other
+    # battles (archive signature, vocabulary, size or edges differ)
+    try:
+        with np.load(path) as data:
+            stored = {name: data[name] for name in data.files}
+    except FileNotFoundError:
+        return None
+    if not np.array_equal(stored["edges"], edges):
+        return None
+    if source is not None and str(stored.get("source", "")) != source_key(source):
+        return None
+    if card_ids is not None and not np.array_equal(stored["card_ids"], card_ids):
+        return None
+    if n_battles is not None and stored["n_battles"].sum() != n_battles:
+        return None
+    if "day_deck_masks" not in stored:
+        return None  # built before the full-day deck summary
+
+    offsets = stored["deck_offsets"]
+    day_summary = {key: stored[f"day_{name}"] for key, name in DECK_SUMMARY_KEYS.items()}
+    segments = [
+        {
+            "card_ids": stored["card_ids"],
+            "n_battles": stored["n_battles"][b],
+            "deck_masks": stored["deck_masks"][offsets[b]:offsets[b + 1]],
+            "deck_counts": stored["deck_counts"][offsets[b]:offsets[b + 1]],
+            "deck_errors": stored["deck_errors"][offsets[b]:offsets[b + 1]],
+            "deck_floor": stored["deck_floor"][b],
+            "deck_total": stored["deck_total"][b],
+            **{name: stored[name][b] for name in BRACKET_TABLES},
+        }
+        for b in range(len(offsets) - 1)
+    ]
+    return segments, day_summary
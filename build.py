@@ -0,0 +1,271 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from battle_store import (
+    BATTLE_ARCHIVE, BATTLE_STORE_DIR, archive_signature, build_store, load_battles, store_is_current, open_store
+)
+from anti_meta import build_matchup_table, tally_card_wins
+from oracle_engine import WEIGHTS_FILE, export_weights
+from ingest import AGGREGATE_DIR, ingest_archive, aggregate_archive, load_merged_aggregates, merge_aggregates, winning_deck_summary
+from card_images import CARD_IMAGE_URL, CARD_IMAGE_DIR, THUMBNAIL_WIDTH, card_keys, build_card_images
+from synergy import SYNERGY_FILE, build_pair_table, write_synergy_matrix, load_card_names, synergy_card_ids
+from card_stats import CARD_STATS_FILE, build_card_stats, save_card_stats, load_card_info
+from brackets import BRACKET_FILE, bracket_labels, bracket_aggregates, save_bracket_aggregates, load_bracket_aggregates
+from archetypes import ARCHETYPE_FILE, ARCHETYPES, archetype_matchups, card_lookup, save_archetype_matchups
+from engine import ORACLE_POOL_SIZE, META_POOL_SIZE, engine_from_aggregates, engine_from_battles
+from meta_matrix import META_MATRIX_DIR, build_meta_matrix
+
+
+# One-time build steps for the precomputed artifacts the app loads at startup.
+#   python build.py store [--archive 20231106.zip] [--out battle_store]
+#   python build.py brackets [--out bracket_aggregates.npz]
+#   python build.py archetypes [--out archetype_matchups.npz]
+#   python build.py meta-matrix [--size 1000] [--from-aggregates] [--out meta_matrix]
+#   python build.py export-model [--model clash_royale_nn_model.keras] [--out clash_royale_nn_weights.npz]
+#   python build.py ingest 20231106.zip 20231107.zip ... [--out aggregates] [--workers N] [--force]
+#   python build.py images [--source URL-template-or-dir] [--out card_images] [--width 128]
+#   python build.py synergy [--from-aggregates] [--min-matches 100] [--out synergy_datasetFinal.csv]
+#   python build.py card-stats [--from-aggregates] [--synergy synergy_datasetFinal.csv] [--out card_stats.npz]
+def cmd_store(args):
+    start = time.perf_counter()
+    meta = build_store(args.archive, args.out)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {meta['n_battles']:,} battles ({meta['n_cards']} cards) to '{args.out}' in {elapsed:.1f}s")
+
+
+def cmd_brackets(args):
+    battles = load_battles(args.archive, args.store)
+    if battles is None:
+        raise SystemExit(f"No battle data found ('{args.archive}' or '{args.store}').")
+
+    start = time.perf_counter()
+    aggregates = bracket_aggregates(battles)
+    save_bracket_aggregates(aggregates, winning_deck_summary(battles), args.out, source=archive_signature(args.archive))
+    elapsed = time.perf_counter() - start
+    sizes = ", ".join(f"{label}: {int(agg['n_battles']):,}" for label, agg in zip(bracket_labels(), aggregates))
+    print(f"Wrote {len(aggregates)} trophy brackets ({sizes}) to '{args.out}' in {elapsed:.1f}s")
+
+
+def cmd_archetypes(args):
+    battles = load_battles(args.archive, args.store)
+    if battles is None:
+        raise SystemExit(f"No battle data found ('{args.archive}' or '{args.store}').")
+
+    start = time.perf_counter()
+    card_ids = np.asarray(battles['card_ids'])
+    wins, matches = archetype_matchups(battles, card_lookup(card_ids, load_card_info()))
+    save_archetype_matchups(
+        wins, matches, card_ids, len(battles['p1_decks']), args.out, source=archive_signature(args.archive)
+    )
+    elapsed = time.perf_counter() - start
+    n_decks = 2 * len(battles['p1_decks'])
+    print(f"Classified {n_decks:,} decks into {len(ARCHETYPES)} archetypes, wrote the "
+          f"{len(ARCHETYPES)}x{len(ARCHETYPES)} win-rate table to '{args.out}' in {elapsed:.1f}s")
+
+
+def cmd_meta_matrix(args):
+    # Every pool the app can serve: the whole day (or the ingested days) and each trophy bracket
+    import pickle
+    from predict import load_oracle
+
+    if args.from_aggregates:
+        aggregates = load_merged_aggregates(args.aggregates)
+        if aggregates is None:
+            raise SystemExit(f"No ingested days in '{args.aggregates}'.")
+        engine = engine_from_aggregates(aggregates)
+    else:
+        battles = load_battles(args.archive, args.store)
+        if battles is None:
+            raise SystemExit(f"No battle data found ('{args.archive}' or '{args.store}').")
+        engine = engine_from_battles(battles, source=archive_signature(args.archive))
+
+    oracle = load_oracle()
+    with open("card_mapping.pkl", "rb") as f:
+        card_to_idx = pickle.load(f)
+    pools = [("All trophies", engine)] + [
+        (label, bracket) for label, bracket in zip(bracket_labels(), engine.brackets) if bracket.n_battles > 0
+    ]
+    for label, pool_engine in pools:
+        meta_pool = pool_engine.meta_pool_5000[:args.size]
+        start = time.perf_counter()
+        path = build_meta_matrix(oracle, meta_pool, card_to_idx, args.out)
+        elapsed = time.perf_counter() - start
+        n_pairs = len(meta_pool) ** 2
+        print(f"{label}: {len(meta_pool)}x{len(meta_pool)} win probabilities -> '{path}' "
+              f"in {elapsed:.1f}s ({n_pairs / elapsed:,.0f} pairs/sec)")
+
+
+def cmd_export_model(args):
+    import tensorflow as tf
+
+    export_weights(tf.keras.models.load_model(args.model), args.out)
+    print(f"Exported '{args.model}' weights to '{args.out}'")
+
+
+def cmd_ingest(args):
+    for archive in args.archives:
+        start = time.perf_counter()
+        path, written = ingest_archive(archive, args.out, force=args.force, workers=args.workers)
+        if written:
+            with np.load(path) as agg:
+                decks = f"{len(agg['deck_counts']):,} decks tracked, counts within +{int(agg['deck_floor']):,}"
+            print(f"Ingested '{archive}' -> '{path}' in {time.perf_counter() - start:.1f}s ({decks})")
+        else:
+            print(f"Skipped '{archive}' (already ingested as '{path}', use --force to redo)")
+
+
+def cmd_synergy(args):
+    # Ingested days when asked, else the memory-mapped store, else one streaming pass over the zip
+    start = time.perf_counter()
+    if args.from_aggregates:
+        tables = load_merged_aggregates(args.aggregates)
+        if tables is None or "pair_wins" not in tables:
+            raise SystemExit(f"No pair tables in '{args.aggregates}' (re-run `build.py ingest --force`).")
+        card_ids, pair_wins, pair_matches = tables["card_ids"], tables["pair_wins"], tables["pair_matches"]
+    elif store_is_current(args.store, args.archive):
+        battles = open_store(args.store)
+        card_ids = np.asarray(battles['card_ids'])
+        p1_won = battles['crowns1'] > battles['crowns2']
+        pair_wins, pair_matches = build_pair_table(battles['p1_decks'], battles['p2_decks'], p1_won, len(card_ids))
+    else:
+        tables = aggregate_archive(args.archive, workers=args.workers)
+        card_ids, pair_wins, pair_matches = tables["card_ids"], tables["pair_wins"], tables["pair_matches"]
+
+    write_synergy_matrix(pair_wins, pair_matches, card_ids, args.out, min_matches=args.min_matches)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(card_ids)}x{len(card_ids)} synergy matrix to '{args.out}' in {elapsed:.1f}s")
+
+
+def cmd_images(args):
+    start = time.perf_counter()
+    written, missing = build_card_images(card_keys(), args.source, args.out, width=args.width, force=args.force)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(written)} card thumbnails to '{args.out}' in {elapsed:.1f}s")
+    if missing:
+        print(f"Missing from '{args.source}': {', '.join(missing)}")
+
+
+def cmd_card_stats(args):
+    # Per-card totals and the matchup table from the ingested days, or from the battles
+    # (reusing the bracket aggregates' matchup tables when they are there)
+    start = time.perf_counter()
+    if args.from_aggregates:
+        tables = load_merged_aggregates(args.aggregates)
+        if tables is None:
+            raise SystemExit(f"No ingested days in '{args.aggregates}'.")
+        card_ids, card_wins, card_matches = tables["card_ids"], tables["card_wins"], tables["card_matches"]
+        matchup_wins, matchup_matches = tables["matchup_wins"], tables["matchup_matches"]
+    else:
+        battles = load_battles(args.archive, args.store)
+        if battles is None:
+            raise SystemExit(f"No battle data found ('{args.archive}' or '{args.store}').")
+        card_ids = np.asarray(battles['card_ids'])
+        p1_won = (battles['crowns1'] > battles['crowns2']).astype(np.int64)
+        p1_wins, p1_matches = tally_card_wins(battles['p1_decks'], p1_won, len(card_ids))
+        p2_wins, p2_matches = tally_card_wins(battles['p2_decks'], 1 - p1_won, len(card_ids))
+        card_wins, card_matches = p1_wins + p2_wins, p1_matches + p2_matches
+        loaded = load_bracket_aggregates(
+            args.brackets, card_ids, len(battles['p1_decks']), source=archive_signature(args.archive)
+        )
+        if loaded is not None:
+            day = merge_aggregates(loaded[0])
+            matchup_wins, matchup_matches = day["matchup_wins"], day["matchup_matches"]
+        else:
+            matchup_wins, matchup_matches = build_matchup_table(battles['p1_decks'], battles['p2_decks'], p1_won, len(card_ids))
+
+    card_info = load_card_info()
+    card_info = {int(c): card_info.get(int(c), {}) for c in card_ids}
+    seen = card_matches > 0
+    win_rates = {int(c): w / m for c, w, m in zip(card_ids[seen], card_wins[seen], card_matches[seen])}
+    matches = {int(c): int(m) for c, m in zip(card_ids, card_matches)}
+
+    synergy_df = pd.read_csv(args.synergy, index_col=0)
+    name_to_id = {name: card for card, name in load_card_names().items()}
+    stats = build_card_stats(
+        card_info, win_rates, matches, synergy_card_ids(synergy_df.columns, name_to_id), synergy_df.to_numpy(),
+        card_ids, matchup_wins, matchup_matches
+    )
+    save_card_stats(stats, args.out)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote stats for {len(stats['card_ids'])} cards to '{args.out}' in {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build precomputed data artifacts for the Clash Royale app.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_store = sub.add_parser("store", help="Encode the battle archive into the memory-mapped columnar store.")
+    p_store.add_argument("--archive", default=BATTLE_ARCHIVE)
+    p_store.add_argument("--out", default=BATTLE_STORE_DIR)
+    p_store.set_defaults(func=cmd_store)
+
+    p_brackets = sub.add_parser("brackets", help="Precompute per-trophy-bracket win rates, matchups and meta decks.")
+    p_brackets.add_argument("--archive", default=BATTLE_ARCHIVE)
+    p_brackets.add_argument("--store", default=BATTLE_STORE_DIR)
+    p_brackets.add_argument("--out", default=BRACKET_FILE)
+    p_brackets.set_defaults(func=cmd_brackets)
+
+    p_archetypes = sub.add_parser("archetypes", help="Classify every deck and tally archetype-vs-archetype win rates.")
+    p_archetypes.add_argument("--archive", default=BATTLE_ARCHIVE)
+    p_archetypes.add_argument("--store", default=BATTLE_STORE_DIR)
+    p_archetypes.add_argument("--out", default=ARCHETYPE_FILE)
+    p_archetypes.set_defaults(func=cmd_archetypes)
+
+    p_matrix = sub.add_parser("meta-matrix", help="Run the Oracle over every pair of meta decks (float16 memmap).")
+    p_matrix.add_argument("--archive", default=BATTLE_ARCHIVE)
+    p_matrix.add_argument("--store", default=BATTLE_STORE_DIR)
+    p_matrix.add_argument("--from-aggregates", action="store_true", help="Use the days merged by `ingest`.")
+    p_matrix.add_argument("--aggregates", default=AGGREGATE_DIR)
+    p_matrix.add_argument("--size", type=int, default=ORACLE_POOL_SIZE, choices=range(1, META_POOL_SIZE + 1),
+                          metavar=f"1..{META_POOL_SIZE}", help="Meta decks per pool (the Oracle uses the top 1,000).")
+    p_matrix.add_argument("--out", default=META_MATRIX_DIR)
+    p_matrix.set_defaults(func=cmd_meta_matrix)
+
+    p_export = sub.add_parser("export-model", help="Export the Keras model weights for TensorFlow-free inference.")
+    p_export.add_argument("--model", default="clash_royale_nn_model.keras")
+    p_export.add_argument("--out", default=WEIGHTS_FILE)
+    p_export.set_defaults(func=cmd_export_model)
+
+    p_ingest = sub.add_parser("ingest", help="Reduce daily battle archives to mergeable aggregates.")
+    p_ingest.add_argument("archives", nargs="+")
+    p_ingest.add_argument("--out", default=AGGREGATE_DIR)
+    p_ingest.add_argument("--workers", type=int, default=None, help="Parser processes (default: all cores).")
+    p_ingest.add_argument("--force", action="store_true")
+    p_ingest.set_defaults(func=cmd_ingest)
+
+    p_images = sub.add_parser("images", help="Fetch card art once and store local thumbnails.")
+    p_images.add_argument("--source", default=CARD_IMAGE_URL, help="URL template with {key}, or a directory of <key>.png files.")
+    p_images.add_argument("--out", default=CARD_IMAGE_DIR)
+    p_images.add_argument("--width", type=int, default=THUMBNAIL_WIDTH)
+    p_images.add_argument("--force", action="store_true")
+    p_images.set_defaults(func=cmd_images)
+
+    p_synergy = sub.add_parser("synergy", help="Rebuild the card synergy matrix from battle data.")
+    p_synergy.add_argument("--archive", default=BATTLE_ARCHIVE)
+    p_synergy.add_argument("--store", default=BATTLE_STORE_DIR)
+    p_synergy.add_argument("--from-aggregates", action="store_true", help="Use the days merged by `ingest`.")
+    p_synergy.add_argument("--aggregates", default=AGGREGATE_DIR)
+    p_synergy.add_argument("--workers", type=int, default=None)
+    p_synergy.add_argument("--min-matches", type=int, default=100, help="Pairs seen less often score 0.")
+    p_synergy.add_argument("--out", default=SYNERGY_FILE)
+    p_synergy.set_defaults(func=cmd_synergy)
+
+    p_stats = sub.add_parser("card-stats", help="Merge per-card win rates, synergies and counters into one table.")
+    p_stats.add_argument("--archive", default=BATTLE_ARCHIVE)
+    p_stats.add_argument("--store", default=BATTLE_STORE_DIR)
+    p_stats.add_argument("--brackets", default=BRACKET_FILE)
+    p_stats.add_argument("--from-aggregates", action="store_true", help="Use the days merged by `ingest`.")
+    p_stats.add_argument("--aggregates", default=AGGREGATE_DIR)
+    p_stats.add_argument("--synergy", default=SYNERGY_FILE)
+    p_stats.add_argument("--out", default=CARD_STATS_FILE)
+    p_stats.set_defaults(func=cmd_card_stats)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
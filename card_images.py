@@ -0,0 +1,81 @@
+import os
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+
+# --- LOCAL CARD THUMBNAILS ---
+# Card art is fetched once (from RoyaleAPI, or from a local directory of <key>.png files
+# when offline), shrunk to a fixed width and written to CARD_IMAGE_DIR, which the app
+# serves from disk instead of hot-linking one remote PNG per card per rerun.
+CARD_IMAGE_URL = "https://raw.githubusercontent.com/RoyaleAPI/cr-api-assets/master/cards/{key}.png"
+CARD_IMAGE_DIR = "card_images"
+THUMBNAIL_WIDTH = 128
+
+
+def card_keys(card_data_file="cards_i18n.json"):
+    # Every card in the localisation file, plus cards the app patches in by hand
+    with open(card_data_file, "r", encoding="utf-8") as f:
+        keys = [card["key"] for card in json.load(f)]
+    return sorted(set(keys) | {"little-prince"})
+
+
+def thumbnail_path(key, image_dir=CARD_IMAGE_DIR):
+    return os.path.join(image_dir, f"{key}.png")
+
+
+def fetch_card_image(key, source=CARD_IMAGE_URL):
+    # `source` is a URL template or a local directory; returns raw bytes, None if absent
+    if os.path.isdir(source):
+        try:
+            with open(os.path.join(source, f"{key}.png"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    try:
+        response = requests.get(source.format(key=key), timeout=10)
+    except requests.RequestException:
+        return None
+    return response.content if response.status_code == 200 else None
+
+
+def make_thumbnail(data, width=THUMBNAIL_WIDTH):
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGBA")
+        height = round(image.height * width / image.width)
+        out = io.BytesIO()
+        image.resize((width, height), Image.LANCZOS).save(out, format="PNG", optimize=True)
+        return out.getvalue()
+
+
+def build_card_images(keys, source=CARD_IMAGE_URL, image_dir=CARD_IMAGE_DIR, width=THUMBNAIL_WIDTH,
+                      workers=8, force=False):
+    # Returns (written, missing) key lists; existing thumbnails are kept unless forced
+    os.makedirs(image_dir, exist_ok=True)
+    todo = [key for key in keys if force or not os.path.exists(thumbnail_path(key, image_dir))]
+
+    def build_one(key):
+        data = fetch_card_image(key, source)
+        if data is None:
+            return key, False
+        with open(thumbnail_path(key, image_dir), "wb") as f:
+            f.write(make_thumbnail(data, width))
+        return key, True
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(build_one, todo))
+    written = [key for key, ok in results if ok]
+    missing = [key for key, ok in results if not ok]
+    return written, missing
+
+
+def list_card_images(image_dir=CARD_IMAGE_DIR):
+    # key -> thumbnail path for every image already built
+    try:
+        names = os.listdir(image_dir)
+    except FileNotFoundError:
+        return {}
+    return {name[:-4]: os.path.join(image_dir, name) for name in names if name.endswith(".png")}
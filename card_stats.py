@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+
+from anti_meta import rank_counters, matchup_baseline
+
+# --- UNIFIED PER-CARD STATS ---
+# One typed table keyed by raw card id, sorted by id, with k ranked synergy partners
+# and hard counters (ids + scores, -1 / NaN padded). card_stats_index turns it into
+# {card_id: record} so each card panel is a single dict lookup.
+CARD_STATS_FILE = "card_stats.npz"
+TOP_K = 10
+
+# Cards the app adds by hand because cards_i18n.json predates them
+EXTRA_CARD_INFO = {26000093: {"elixir": 3, "type": "Troop"}}
+
+
+def load_card_info(card_data_file="cards_i18n.json"):
+    with open(card_data_file, "r", encoding="utf-8") as f:
+        info = {card["id"]: {"elixir": card.get("elixir", 0), "type": card.get("type", "Troop").capitalize()}
+                for card in json.load(f)}
+    return {**info, **EXTRA_CARD_INFO}
+
+
+def top_k_excluding(scores, exclude, k, ascending=False):
+    # Positions of the k best finite scores, skipping position `exclude`
+    scores = np.where(np.isfinite(scores), scores, np.nan)
+    scores[exclude] = np.nan
+    valid = np.flatnonzero(~np.isnan(scores))
+    order = valid[np.argsort(scores[valid] if ascending else -scores[valid], kind='stable')]
+    return order[:k]
+
+
+def build_card_stats(card_info, win_rates, matches, synergy_ids, synergy,
+                     matchup_ids=None, matchup_wins=None, matchup_matches=None, k=TOP_K):
+    # card_info: {card_id: {"elixir", "type"}}; win_rates / matches: {card_id: value}.
+    # Counters rank by win-rate delta over the matchup table when given, else by lowest synergy.
+    card_ids = np.array(sorted(card_info), dtype=np.int64)
+    n_cards = len(card_ids)
+    stats = {
+        "card_ids": card_ids,
+        "win_rate": np.array([win_rates.get(int(c), np.nan) for c in card_ids], dtype=np.float32),
+        "matches": np.array([matches.get(int(c), 0) for c in card_ids], dtype=np.int64),
+        "elixir": np.array([card_info[int(c)].get("elixir", 0) for c in card_ids], dtype=np.uint8),
+        "card_type": np.array([card_info[int(c)].get("type", "Troop") for c in card_ids], dtype="U8"),
+        "synergy_ids": np.full((n_cards, k), -1, dtype=np.int64),
+        "synergy_scores": np.full((n_cards, k), np.nan, dtype=np.float32),
+        "counter_ids": np.full((n_cards, k), -1, dtype=np.int64),
+        "counter_scores": np.full((n_cards, k), np.nan, dtype=np.float32),
+    }
+
+    # Restrict both tables to cards in the stats universe
+    synergy_ids = np.asarray(synergy_ids)
+    syn_keep = np.flatnonzero(np.isin(synergy_ids, card_ids))
+    syn_pos = {int(synergy_ids[i]): j for j, i in enumerate(syn_keep)}
+    synergy = np.asarray(synergy, dtype=np.float64)[np.ix_(syn_keep, syn_keep)]
+    syn_ids = synergy_ids[syn_keep]
+
+    if matchup_wins is not None:
+        matchup_ids = np.asarray(matchup_ids)
+        baseline = matchup_baseline(matchup_wins, matchup_matches)
+        vs_pos = {int(c): i for i, c in enumerate(matchup_ids)}
+        in_universe = np.isin(matchup_ids, card_ids)
+
+    for row, card in enumerate(card_ids):
+        card = int(card)
+        if card in syn_pos:
+            col = syn_pos[card]
+            top = top_k_excluding(synergy[:, col], col, k)
+            stats["synergy_ids"][row, :len(top)] = syn_ids[top]
+            stats["synergy_scores"][row, :len(top)] = synergy[top, col]
+
+        if matchup_wins is not None and card in vs_pos:
+            col = vs_pos[card]
+            order, delta, _ = rank_counters(matchup_wins[:, col], matchup_matches[:, col], baseline, exclude=col)
+            order = order[in_universe[order]][:k]
+            stats["counter_ids"][row, :len(order)] = matchup_ids[order]
+            stats["counter_scores"][row, :len(order)] = delta[order]
+        elif card in syn_pos:
+            col = syn_pos[card]
+            top = top_k_excluding(synergy[:, col], col, k, ascending=True)
+            stats["counter_ids"][row, :len(top)] = syn_ids[top]
+            stats["counter_scores"][row, :len(top)] = synergy[top, col]
+    return stats
+
+
+def save_card_stats(stats, path=CARD_STATS_FILE):
+    np.savez(path, **stats)
+
+
+def load_card_stats(path=CARD_STATS_FILE):
+    try:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    except FileNotFoundError:
+        return None
+
+
+def card_stats_index(stats):
+    # {card_id: record} with padding stripped; win_rate is None when unknown
+    index = {}
+    for row, card in enumerate(stats["card_ids"]):
+        syn = stats["synergy_ids"][row] >= 0
+        cnt = stats["counter_ids"][row] >= 0
+        win_rate = float(stats["win_rate"][row])
+        index[int(card)] = {
+            "win_rate": None if np.isnan(win_rate) else win_rate,
+            "matches": int(stats["matches"][row]),
+            "elixir": int(stats["elixir"][row]),
+            "type": str(stats["card_type"][row]),
+            "synergies": [int(c) for c in stats["synergy_ids"][row][syn]],
+            "synergy_scores": [float(s) for s in stats["synergy_scores"][row][syn]],
+            "counters": [int(c) for c in stats["counter_ids"][row][cnt]],
+            "counter_scores": [float(s) for s in stats["counter_scores"][row][cnt]],
+        }
+    return index
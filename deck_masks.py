@@ -0,0 +1,84 @@
+import numpy as np
+
+# --- 128-BIT DECK MASKS ---
+# A deck of encoded card indices (< 128) becomes two uint64 words with one bit per
+# card, so card order disappears and equal decks compare/hash as equal rows.
+MASK_WORDS = 2
+
+
+def deck_masks(decks):
+    decks = np.asarray(decks)
+    if decks.size and decks.max() >= 64 * MASK_WORDS:
+        raise ValueError(f"Card index {decks.max()} does not fit in a {64 * MASK_WORDS}-bit deck mask.")
+    bits = np.left_shift(np.uint64(1), (decks % 64).astype(np.uint64))
+    word = decks // 64
+    return np.stack(
+        [np.bitwise_or.reduce(np.where(word == w, bits, np.uint64(0)), axis=1) for w in range(MASK_WORDS)],
+        axis=1
+    )
+
+
+def masks_to_decks(masks, deck_size=8):
+    # Inverse of deck_masks; card indices come back sorted
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    bits = np.unpackbits(masks.view(np.uint8), axis=1, bitorder='little')
+    return np.nonzero(bits)[1].reshape(-1, deck_size).astype(np.uint8)
+
+
+def masks_contain(masks, card):
+    # Bool per deck: does it hold encoded card `card`?
+    return (masks[:, card // 64] >> np.uint64(card % 64)) & np.uint64(1) == 1
+
+
+def unique_masks(masks):
+    # (first, inverse) of the distinct rows, in mask order.
+    # Each word is ranked on its own, then the ranks are combined into one int64 key:
+    # a 1-D np.unique is far cheaper than unique over 128-bit rows.
+    masks = np.asarray(masks, dtype=np.uint64)
+    key = np.zeros(len(masks), dtype=np.int64)
+    for w in range(MASK_WORDS):
+        values, rank = np.unique(masks[:, w], return_inverse=True)
+        key = key * len(values) + rank.ravel()
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    return first, inverse.ravel()
+
+
+def count_unique_masks(masks, counts=None):
+    # Distinct decks and how often each occurs (weighted by `counts` when merging)
+    masks = np.asarray(masks, dtype=np.uint64)
+    first, inverse = unique_masks(masks)
+    freq = np.bincount(inverse, weights=counts, minlength=len(first))
+    return masks[first], freq.astype(np.int64)
+
+
+def top_decks(masks, counts, k):
+    # Most frequent k decks, ties in mask order
+    order = np.argsort(-counts, kind='stable')[:k]
+    return masks[order], counts[order]
+
+
+# --- CARD MEMBERSHIP INDEX OVER A DECK POOL ---
+def build_pool_index(masks, n_cards):
+    # membership[c] is a bool row over pool positions (pool is ordered best-first);
+    # first[c] is the best deck holding c, or -1
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    bits = np.unpackbits(masks.view(np.uint8), axis=1, bitorder='little')[:, :n_cards]
+    membership = np.ascontiguousarray(bits.T.astype(bool))
+    has_any = membership.any(axis=1)
+    first = np.where(has_any, membership.argmax(axis=1), -1)
+    return {"masks": masks, "membership": membership, "first": first}
+
+
+def query_pool(pool_index, include=(), exclude=(), k=None):
+    # Pool positions (best first) of decks holding every `include` card and no `exclude` card
+    membership = pool_index["membership"]
+    if len(include) == 1 and not exclude and k == 1:
+        first = pool_index["first"][include[0]]
+        return np.array([first] if first >= 0 else [], dtype=np.int64)
+
+    selected = np.ones(membership.shape[1], dtype=bool)
+    for card in include:
+        selected &= membership[card]
+    for card in exclude:
+        selected &= ~membership[card]
+    return np.flatnonzero(selected)[:k]
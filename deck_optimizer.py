@@ -0,0 +1,112 @@
+import numpy as np
+
+# --- VECTORIZED SWAP SCORING OVER THE SYNERGY MATRIX ---
+# A deck's synergy is the sum of S[a, b] over its 28 card pairs (S symmetric, zero
+# diagonal). Replacing the card in slot i with card c changes it by
+#   (sum_j S[c, deck[j]] - S[c, deck[i]]) - sum_j S[deck[i], deck[j]]
+# so one (8, n_cards) array scores every (slot, candidate) swap at once.
+
+
+def deck_synergy(synergy, deck):
+    deck = np.asarray(deck)
+    return synergy[np.ix_(deck, deck)].sum() / 2
+
+
+def swap_gains(synergy, deck):
+    deck = np.asarray(deck)
+    to_deck = synergy[:, deck]
+    contribution = to_deck[deck].sum(axis=1)
+    return to_deck.sum(axis=1)[None, :] - to_deck.T - contribution[:, None]
+
+
+def swap_mask(deck, n_cards, locked_cards=(), allowed=None, elixir=None, elixir_range=None):
+    # Bool (8, n_cards): which swaps respect the constraints. Cards already in the deck
+    # never come in, locked cards never go out, and the average elixir stays in range.
+    deck = np.asarray(deck)
+    mask = np.ones((len(deck), n_cards), dtype=bool)
+    mask[:, deck] = False
+    mask[np.isin(deck, list(locked_cards))] = False
+    if allowed is not None:
+        mask &= allowed[None, :]
+    if elixir is not None and elixir_range is not None:
+        avg = (elixir[deck].sum() - elixir[deck][:, None] + elixir[None, :]) / len(deck)
+        mask &= (avg >= elixir_range[0]) & (avg <= elixir_range[1])
+    return mask
+
+
+def elixir_distance(avg, elixir_range):
+    return np.maximum(np.maximum(elixir_range[0] - avg, avg - elixir_range[1]), 0)
+
+
+def constraint_distance(deck, locked_cards=(), allowed=None, elixir=None, elixir_range=None):
+    # 0 when a deck meets swap_mask's constraints (locked cards are in it by definition),
+    # else its disallowed cards plus the average elixir's distance to the range
+    deck = np.asarray(deck)
+    distance = 0.0
+    if allowed is not None:
+        distance += float((~allowed[deck]).sum())
+    if elixir is not None and elixir_range is not None:
+        distance += float(elixir_distance(elixir[deck].sum() / len(deck), elixir_range))
+    return distance
+
+
+def repair_mask(deck, n_cards, locked_cards=(), allowed=None, elixir=None, elixir_range=None):
+    # For a deck outside the constraints: the swaps that bring it strictly closer to them,
+    # and the distance each one leaves
+    deck = np.asarray(deck)
+    mask = swap_mask(deck, n_cards, locked_cards, allowed)
+    current = constraint_distance(deck, locked_cards, allowed, elixir, elixir_range)
+    distance = np.full(mask.shape, current)
+    if allowed is not None:
+        distance -= (~allowed[deck])[:, None]  # swap_mask only lets allowed cards in
+    if elixir is not None and elixir_range is not None:
+        avg = (elixir[deck].sum() - elixir[deck][:, None] + elixir[None, :]) / len(deck)
+        distance += elixir_distance(avg, elixir_range) - elixir_distance(elixir[deck].sum() / len(deck), elixir_range)
+    return mask & (distance < current - 1e-9), distance
+
+
+def optimize_deck(synergy, deck, max_swaps=3, beam_width=8, **constraints):
+    # Beam search over improving swaps, up to `max_swaps` cards changed. Returns
+    # (deck, score, swaps) for every distinct deck reached that meets the constraints,
+    # best score first (empty when none does); swaps are (slot, card_out, card_in)
+    # steps from the starting deck. A deck outside the constraints (only ever the start
+    # or its repairs) is never returned: its swaps must bring it closer to them, whatever
+    # they cost in synergy, and the beam keeps decks inside the constraints first.
+    n_cards = len(synergy)
+    start = np.asarray(deck)
+    beam = [(start, deck_synergy(synergy, start), [], constraint_distance(start, **constraints))]
+    reached = [entry for entry in beam if entry[3] == 0]
+    seen = {tuple(np.sort(start))}
+
+    for _ in range(max_swaps):
+        candidates = []
+        for current, score, swaps, distance in beam:
+            if distance == 0:
+                gains = np.where(swap_mask(current, n_cards, **constraints), swap_gains(synergy, current), -np.inf)
+                flat = gains.ravel()
+                top = np.argsort(-flat)[:beam_width]
+                top = top[flat[top] > 1e-12]
+            else:
+                # Closest to the constraints first, synergy breaking ties
+                mask, after = repair_mask(current, n_cards, **constraints)
+                gains = np.where(mask, swap_gains(synergy, current), -np.inf)
+                flat = gains.ravel()
+                top = np.lexsort((-flat, np.where(mask, after, np.inf).ravel()))[:beam_width]
+                top = top[np.isfinite(flat[top])]
+            for slot, card in zip(*np.unravel_index(top, gains.shape)):
+                new_deck = current.copy()
+                new_deck[slot] = card
+                key = tuple(np.sort(new_deck))
+                if key in seen:
+                    continue
+                seen.add(key)
+                candidates.append((new_deck, score + gains[slot, card], swaps + [(int(slot), int(current[slot]), int(card))],
+                                   constraint_distance(new_deck, **constraints)))
+        if not candidates:
+            break
+        candidates.sort(key=lambda c: (c[3], -c[1]))
+        beam = candidates[:beam_width]
+        reached.extend(entry for entry in beam if entry[3] == 0)
+
+    reached.sort(key=lambda c: -c[1])
+    return [(deck, score, swaps) for deck, score, swaps, _ in reached]
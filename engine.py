@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+import numpy as np
+
+from archetypes import ARCHETYPE_FILE, archetype_matchups, card_lookup, load_archetype_matchups
+from brackets import BRACKET_FILE, bracket_aggregates, load_bracket_aggregates
+from card_stats import load_card_info
+from deck_masks import masks_to_decks, build_pool_index
+from heavy_hitters import summary_top, guaranteed_top
+from ingest import merge_aggregates, deck_summary, deck_summary_fields, winning_deck_summary
+
+# --- IMMUTABLE ANTI-META ENGINE ---
+# Built once per process and handed out by reference (st.cache_resource), never copied.
+# It holds no per-battle arrays: the battles are read (memory-mapped from the store, so
+# every worker on a host shares one page-cache copy) only while building the tables.
+# Everything the engines query is small and precomputed: card win rates, the card-vs-card matchup table, the meta pools (raw id
+# arrays, best first, from the fixed-size heavy-hitter summary) with their card index and
+# error bounds, the archetype-vs-archetype table, and one engine per trophy bracket.
+META_POOL_SIZE = 5000
+ORACLE_POOL_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class AntiMetaEngine:
+    card_ids: np.ndarray
+    global_wr: MappingProxyType
+    card_matches: MappingProxyType
+    meta_pool_5000: np.ndarray
+    meta_pool_1000: np.ndarray
+    meta_index: MappingProxyType
+    matchup_wins: np.ndarray
+    matchup_matches: np.ndarray
+    n_battles: int
+    meta_guaranteed: int = 0
+    meta_max_error: int = 0
+    archetype_wins: np.ndarray = None
+    archetype_matches: np.ndarray = None
+    brackets: tuple = field(default_factory=tuple)
+
+
+def read_only(array):
+    array = np.asarray(array)
+    if array.flags.writeable:
+        array.flags.writeable = False
+    return array
+
+
+def build_meta_pools(card_ids, summary, k=META_POOL_SIZE):
+    # Top-k winning decks as sorted raw ids, a card -> pool position index, and the
+    # summary's bounds: pool decks certainly in the true top-k, largest count overestimate
+    meta_masks, _, errors = summary_top(summary, k)
+    meta_pool = np.sort(np.asarray(card_ids)[masks_to_decks(meta_masks)], axis=1)
+    bounds = {"meta_guaranteed": guaranteed_top(summary, k), "meta_max_error": int(errors.max(initial=0))}
+    return read_only(meta_pool), build_pool_index(meta_masks, len(card_ids)), bounds
+
+
+def engine_from_aggregates(aggregates, brackets=(), archetypes=None):
+    # Counters come from the matchup table, so no raw battles are kept
+    card_ids = read_only(aggregates['card_ids'])
+    seen_cards = np.flatnonzero(aggregates['card_matches'])
+    seen_wr = aggregates['card_wins'][seen_cards] / (aggregates['card_matches'][seen_cards] + 1e-9)
+    meta_pool, meta_index, meta_bounds = build_meta_pools(card_ids, deck_summary(aggregates))
+    return AntiMetaEngine(
+        card_ids=card_ids,
+        global_wr=MappingProxyType({int(card_ids[card]): float(wr) for card, wr in zip(seen_cards, seen_wr)}),
+        card_matches=MappingProxyType({int(c): int(m) for c, m in zip(card_ids, aggregates['card_matches'])}),
+        meta_pool_5000=meta_pool,
+        meta_pool_1000=read_only(meta_pool[:ORACLE_POOL_SIZE]),
+        meta_index=MappingProxyType({name: read_only(a) for name, a in meta_index.items()}),
+        matchup_wins=read_only(aggregates['matchup_wins']),
+        matchup_matches=read_only(aggregates['matchup_matches']),
+        n_battles=int(aggregates['n_battles']),
+        brackets=tuple(brackets),
+        archetype_wins=read_only(archetypes[0]) if archetypes is not None else None,
+        archetype_matches=read_only(archetypes[1]) if archetypes is not None else None,
+        **meta_bounds
+    )
+
+
+def engine_from_battles(battles, bracket_file=BRACKET_FILE, archetype_file=ARCHETYPE_FILE, source=None):
+    # Per-bracket aggregates and archetype tables (prebuilt by `python build.py brackets` /
+    # `archetypes`, else one pass each here) add up to the whole day, so the full engine's
+    # tables are their merge: no second battle scan. Its meta pool comes from the exact
+    # full-day deck summary, not from the merged (truncated) bracket summaries.
+    # source: the battles' archive_signature; prebuilt tables from another archive are rebuilt
+    card_ids = np.asarray(battles['card_ids'])
+    n_battles = len(battles['p1_decks'])
+    loaded = load_bracket_aggregates(bracket_file, card_ids, n_battles, source=source)
+    if loaded is None:
+        loaded = bracket_aggregates(battles), winning_deck_summary(battles)
+    segments, day_summary = loaded
+    archetypes = load_archetype_matchups(archetype_file, card_ids, n_battles, source=source)
+    if archetypes is None:
+        archetypes = archetype_matchups(battles, card_lookup(card_ids, load_card_info()))
+    wins, matches = archetypes
+
+    brackets = [engine_from_aggregates(agg, archetypes=(wins[b], matches[b])) for b, agg in enumerate(segments)]
+    day = dict(merge_aggregates(segments), **deck_summary_fields(day_summary))
+    return engine_from_aggregates(day, brackets, (wins.sum(axis=0), matches.sum(axis=0)))
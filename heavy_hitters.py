@@ -0,0 +1,78 @@
+import numpy as np
+
+from deck_masks import MASK_WORDS, count_unique_masks, unique_masks
+
+# --- MERGEABLE SPACE-SAVING SUMMARY OVER DECK MASKS ---
+# At most `capacity` (deck mask, count, error) counters, however many battles are fed in.
+# count is an upper bound on a deck's true frequency and count - error a lower bound;
+# `floor` bounds the frequency of any deck not in the summary. A chunk is counted exactly
+# (np.unique, bounded by the chunk) and truncated to a summary; summaries merge by adding
+# counts, with a missing deck charged the other summary's floor, then keep the top
+# `capacity` (the mergeable Space-Saving rule). Overestimates stay <= total / capacity.
+HEAVY_HITTER_CAPACITY = 20_000
+
+
+def empty_summary():
+    return {
+        "masks": np.zeros((0, MASK_WORDS), dtype=np.uint64),
+        "counts": np.zeros(0, dtype=np.int64),
+        "errors": np.zeros(0, dtype=np.int64),
+        "floor": np.int64(0),
+        "total": np.int64(0),
+    }
+
+
+def truncate_summary(masks, counts, errors, floor, total, capacity=HEAVY_HITTER_CAPACITY):
+    # Keep the `capacity` largest counts (ties in mask order); the largest dropped count
+    # becomes the floor for decks no longer tracked
+    order = np.argsort(-counts, kind='stable')
+    keep = np.sort(order[:capacity])
+    if len(order) > capacity:
+        floor = max(int(floor), int(counts[order[capacity]]))
+    return {
+        "masks": masks[keep],
+        "counts": counts[keep].astype(np.int64),
+        "errors": errors[keep].astype(np.int64),
+        "floor": np.int64(floor),
+        "total": np.int64(total),
+    }
+
+
+def summarize_masks(masks, counts=None, capacity=HEAVY_HITTER_CAPACITY):
+    # Exact counts for one chunk of winning-deck masks, truncated to a summary
+    masks, counts = count_unique_masks(masks, counts)
+    return truncate_summary(masks, counts, np.zeros(len(counts), dtype=np.int64), 0, counts.sum(), capacity)
+
+
+def merge_summaries(summaries, capacity=HEAVY_HITTER_CAPACITY):
+    summaries = list(summaries)
+    if not summaries:
+        return empty_summary()
+    masks = np.concatenate([s["masks"] for s in summaries]).astype(np.uint64)
+    first, inverse = unique_masks(masks)
+
+    # Every deck starts at the sum of all floors, each summary tracking it swaps its
+    # floor for its own count / error
+    floors = sum(int(s["floor"]) for s in summaries)
+    source_floor = np.concatenate([np.full(len(s["counts"]), s["floor"], dtype=np.int64) for s in summaries])
+    counts = floors + np.bincount(inverse, weights=np.concatenate([s["counts"] for s in summaries]) - source_floor,
+                                  minlength=len(first))
+    errors = floors + np.bincount(inverse, weights=np.concatenate([s["errors"] for s in summaries]) - source_floor,
+                                  minlength=len(first))
+    total = sum(int(s["total"]) for s in summaries)
+    return truncate_summary(masks[first], np.rint(counts).astype(np.int64), np.rint(errors).astype(np.int64),
+                            floors, total, capacity)
+
+
+def summary_top(summary, k):
+    # Top-k (masks, upper-bound counts, errors), most frequent first, ties in mask order
+    order = np.argsort(-summary["counts"], kind='stable')[:k]
+    return summary["masks"][order], summary["counts"][order], summary["errors"][order]
+
+
+def guaranteed_top(summary, k):
+    # How many of the reported top-k are certainly in the true top-k: their lower bound
+    # beats the upper bound of every deck ranked below k (tracked or not)
+    _, counts, errors = summary_top(summary, len(summary["counts"]))
+    outside = max(int(summary["floor"]), int(counts[k]) if len(counts) > k else 0)
+    return int(((counts[:k] - errors[:k]) >= outside).sum())
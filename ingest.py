@@ -0,0 +1,184 @@
+import os
+import io
+import glob
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from battle_store import encode_battles, read_battle_archive, iter_archive_chunks
+from anti_meta import tally_card_wins, build_matchup_table
+from deck_masks import deck_masks, masks_to_decks
+from synergy import build_pair_table
+from heavy_hitters import summarize_masks, truncate_summary, merge_summaries
+
+# --- MERGEABLE DAILY AGGREGATES ---
+# Each daily dump is reduced once to sums that add up across days:
+#   card_wins / card_matches      per-card totals (both sides)
+#   matchup_wins / matchup_matches  card-vs-card table (see anti_meta.build_matchup_table)
+#   pair_wins / pair_matches      card-with-card co-occurrence table (see synergy.build_pair_table)
+#   deck_*                        Space-Saving summary of winning decks (128-bit masks, see heavy_hitters.py):
+#                                 masks, upper-bound counts, errors, floor and total, fixed size
+AGGREGATE_DIR = "aggregates"
+CARD_TABLES = ("matchup_wins", "matchup_matches", "pair_wins", "pair_matches")
+DECK_SUMMARY_KEYS = {"masks": "deck_masks", "counts": "deck_counts", "errors": "deck_errors",
+                     "floor": "deck_floor", "total": "deck_total"}
+
+
+def deck_summary(agg):
+    # Days ingested before the summary existed hold exact counts for every distinct deck
+    if "deck_errors" not in agg:
+        counts = agg["deck_counts"]
+        return truncate_summary(agg["deck_masks"], counts, np.zeros_like(counts), 0, counts.sum())
+    return {key: agg[name] for key, name in DECK_SUMMARY_KEYS.items()}
+
+
+def deck_summary_fields(summary):
+    return {name: summary[key] for key, name in DECK_SUMMARY_KEYS.items()}
+
+
+def day_label(archive):
+    return os.path.splitext(os.path.basename(archive))[0]
+
+
+def winning_deck_summary(battles):
+    # Exact counts of every winning deck in one pass, truncated to a summary
+    p1_won = np.asarray(battles["crowns1"] > battles["crowns2"])
+    winning = np.vstack((battles["p1_decks"][p1_won], battles["p2_decks"][~p1_won]))
+    return summarize_masks(deck_masks(winning))
+
+
+def aggregate_battles(battles, pair_tables=True):
+    card_ids = np.asarray(battles["card_ids"])
+    n_cards = len(card_ids)
+    p1_decks, p2_decks = battles["p1_decks"], battles["p2_decks"]
+    p1_won = np.asarray(battles["crowns1"] > battles["crowns2"], dtype=np.int64)
+
+    p1_wins, p1_matches = tally_card_wins(p1_decks, p1_won, n_cards)
+    p2_wins, p2_matches = tally_card_wins(p2_decks, 1 - p1_won, n_cards)
+    matchup_wins, matchup_matches = build_matchup_table(p1_decks, p2_decks, p1_won, n_cards)
+
+    agg = {
+        "card_ids": card_ids,
+        "n_battles": np.int64(len(p1_decks)),
+        "card_wins": (p1_wins + p2_wins).astype(np.int64),
+        "card_matches": (p1_matches + p2_matches).astype(np.int64),
+        "matchup_wins": matchup_wins,
+        "matchup_matches": matchup_matches,
+        **deck_summary_fields(winning_deck_summary(battles)),
+    }
+    if pair_tables:
+        agg["pair_wins"], agg["pair_matches"] = build_pair_table(p1_decks, p2_decks, p1_won, n_cards)
+    return agg
+
+
+def align_aggregate(agg, card_ids):
+    # Re-index an aggregate onto a (super)set vocabulary of raw card ids
+    if np.array_equal(agg["card_ids"], card_ids):
+        return agg
+    pos = {int(c): i for i, c in enumerate(card_ids)}
+    remap = np.array([pos[int(c)] for c in agg["card_ids"]])
+    n_cards = len(card_ids)
+
+    aligned = dict(agg, card_ids=np.asarray(card_ids))
+    for name in ("card_wins", "card_matches"):
+        aligned[name] = np.zeros(n_cards, dtype=np.int64)
+        aligned[name][remap] = agg[name]
+    for name in CARD_TABLES:
+        if name not in agg:
+            continue
+        aligned[name] = np.zeros((n_cards, n_cards), dtype=np.int64)
+        aligned[name][np.ix_(remap, remap)] = agg[name]
+    aligned["deck_masks"] = deck_masks(remap[masks_to_decks(agg["deck_masks"])])
+    return aligned
+
+
+def merge_aggregates(aggregates):
+    aggregates = list(aggregates)
+    if not aggregates:
+        return None
+
+    # Union vocabulary: first day's order, later days' new cards appended
+    card_ids = list(aggregates[0]["card_ids"])
+    known = set(int(c) for c in card_ids)
+    for agg in aggregates[1:]:
+        for c in agg["card_ids"]:
+            if int(c) not in known:
+                known.add(int(c))
+                card_ids.append(c)
+    card_ids = np.array(card_ids, dtype=np.int64)
+    aggregates = [align_aggregate(agg, card_ids) for agg in aggregates]
+
+    merged = {"card_ids": card_ids}
+    for name in ("n_battles", "card_wins", "card_matches") + CARD_TABLES:
+        # Days ingested before a table existed leave it out of the merge
+        if all(name in agg for agg in aggregates):
+            merged[name] = sum(agg[name] for agg in aggregates)
+
+    merged.update(deck_summary_fields(merge_summaries(deck_summary(agg) for agg in aggregates)))
+    return merged
+
+
+# --- PARALLEL CHUNKED PARSING ---
+def aggregate_chunk(data):
+    # Worker: raw CSV bytes -> uint8-encoded battles -> partial aggregate
+    return aggregate_battles(encode_battles(read_battle_archive(io.BytesIO(data))))
+
+
+def aggregate_archive(archive, workers=None, chunk_bytes=64 << 20):
+    # Streams the archive through a process pool, keeping at most 2 chunks per
+    # worker in flight, and folds partials into a running total as they finish
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_archive_chunks(archive, chunk_bytes)
+    total = None
+    if workers == 1:
+        for data in chunks:
+            total = fold_aggregate(total, aggregate_chunk(data))
+        return total
+
+    pending = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for data in chunks:
+            pending.append(pool.submit(aggregate_chunk, data))
+            if len(pending) >= 2 * workers:
+                total = fold_aggregate(total, pending.pop(0).result())
+        for future in pending:
+            total = fold_aggregate(total, future.result())
+    return total
+
+
+def fold_aggregate(total, part):
+    return part if total is None else merge_aggregates([total, part])
+
+
+# --- ON-DISK DAILY PARTIALS ---
+def aggregate_path(label, out_dir=AGGREGATE_DIR):
+    return os.path.join(out_dir, f"{label}.npz")
+
+
+def ingest_archive(archive, out_dir=AGGREGATE_DIR, force=False, workers=None):
+    # Parse a daily dump once; already-ingested days are skipped
+    path = aggregate_path(day_label(archive), out_dir)
+    if os.path.exists(path) and not force:
+        return path, False
+    os.makedirs(out_dir, exist_ok=True)
+    agg = aggregate_archive(archive, workers=workers)
+    np.savez_compressed(path, **agg)
+    return path, True
+
+
+def list_ingested_days(out_dir=AGGREGATE_DIR):
+    # Day labels are sortable (YYYYMMDD), oldest first
+    return sorted(day_label(path) for path in glob.glob(os.path.join(out_dir, "*.npz")))
+
+
+def load_aggregate(label, out_dir=AGGREGATE_DIR):
+    with np.load(aggregate_path(label, out_dir)) as data:
+        return {name: data[name] for name in data.files}
+
+
+def load_merged_aggregates(out_dir=AGGREGATE_DIR, window_days=None):
+    # Merge every ingested day, or only the most recent `window_days`
+    days = list_ingested_days(out_dir)
+    if window_days:
+        days = days[-window_days:]
+    return merge_aggregates(load_aggregate(day, out_dir) for day in days)
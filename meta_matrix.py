@@ -0,0 +1,95 @@
+import hashlib
+import os
+
+import numpy as np
+
+from oracle_engine import WEIGHTS_FILE, encode_decks
+
+# --- PRECOMPUTED META-POOL WIN PROBABILITIES ---
+# The Oracle network run once over every (opponent, counter) pair of a meta pool:
+#   win_probs[i, j] = P(pool deck j beats pool deck i), deck i on the model's player-1 side
+# so row i is exactly what the Oracle scores for opponent i. Stored as a float16 .npy per
+# pool and memory-mapped, one file per (pool, model) under a content key, so bracket pools,
+# ingested-day pools and retrained models never pick up a stale matrix.
+META_MATRIX_DIR = "meta_matrix"
+MODEL_FILES = (WEIGHTS_FILE, "clash_royale_nn_model.keras")
+
+# Tier cut-offs on the pool's expected win rate percentile, best first
+TIERS = (("S", 0.95), ("A", 0.80), ("B", 0.50), ("C", 0.20), ("D", 0.0))
+
+
+def matrix_key(meta_pool, model_files=MODEL_FILES):
+    # Raw-id pool (rows in pool order) plus the bytes of the model files
+    digest = hashlib.sha1(np.ascontiguousarray(meta_pool, dtype=np.int64).tobytes())
+    for path in model_files:
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            continue
+    return digest.hexdigest()[:16]
+
+
+def matrix_path(meta_pool, matrix_dir=META_MATRIX_DIR, model_files=MODEL_FILES):
+    return os.path.join(matrix_dir, f"{matrix_key(meta_pool, model_files)}.npy")
+
+
+def pairwise_win_probs(oracle, meta_batch, out, batch_pairs=1 << 20):
+    # Fills `out` row block by row block, ~batch_pairs model pairs per call
+    meta_projection = oracle.project_meta(oracle.embed(meta_batch))
+    rows = max(1, batch_pairs // len(meta_batch))
+    for lo in range(0, len(meta_batch), rows):
+        out[lo:lo + rows] = oracle.score_many(meta_batch[lo:lo + rows], meta_projection)
+    return out
+
+
+def build_meta_matrix(oracle, meta_pool, card_to_idx, matrix_dir=META_MATRIX_DIR, model_files=MODEL_FILES):
+    # Written straight into a float16 memmap under a private name, then renamed into place
+    path = matrix_path(meta_pool, matrix_dir, model_files)
+    os.makedirs(matrix_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}.npy"
+    n_decks = len(meta_pool)
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16, shape=(n_decks, n_decks))
+    pairwise_win_probs(oracle, encode_decks(meta_pool, card_to_idx), out)
+    out.flush()
+    del out
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_meta_matrix(meta_pool, sizes, matrix_dir=META_MATRIX_DIR, model_files=MODEL_FILES):
+    # Largest prebuilt matrix over a prefix of the pool (pools are best-first, so a bigger
+    # matrix holds every smaller one in its top-left corner); None when none was built
+    for size in sorted(set(sizes), reverse=True):
+        path = matrix_path(meta_pool[:size], matrix_dir, model_files)
+        if size <= len(meta_pool) and os.path.exists(path):
+            win_probs = np.load(path, mmap_mode="r")
+            if win_probs.shape == (size, size):
+                return win_probs
+    return None
+
+
+# --- META TIER LIST ---
+def expected_win_rates(win_probs, chunk_rows=1024):
+    # Mean win probability against the rest of the pool, averaged over both seats:
+    # as player 2 (column means) and as player 1 (1 - row means), mirror match left out
+    n_decks = len(win_probs)
+    col_sums = np.zeros(n_decks)
+    row_sums = np.zeros(n_decks)
+    diagonal = np.zeros(n_decks)
+    for lo in range(0, n_decks, chunk_rows):
+        block = np.asarray(win_probs[lo:lo + chunk_rows], dtype=np.float64)
+        col_sums += block.sum(axis=0)
+        row_sums[lo:lo + chunk_rows] = block.sum(axis=1)
+        diagonal[lo:lo + chunk_rows] = block[np.arange(len(block)), lo + np.arange(len(block))]
+    others = max(n_decks - 1, 1)
+    return ((col_sums - diagonal) / others + 1 - (row_sums - diagonal) / others) / 2
+
+
+def tier_list(win_probs):
+    # (order best first, expected win rates, tier label per deck) in pool order
+    expected = expected_win_rates(win_probs)
+    cutoffs = np.quantile(expected, [q for _, q in TIERS]) if len(expected) else np.zeros(len(TIERS))
+    tier_idx = np.argmax(expected[:, None] >= cutoffs[None, :], axis=1)
+    tiers = np.array([name for name, _ in TIERS])[tier_idx]
+    return np.argsort(-expected, kind="stable"), expected, tiers
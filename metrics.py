@@ -0,0 +1,157 @@
+import json
+import os
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+# --- LIGHTWEIGHT SPANS, HISTOGRAMS AND CACHE STATS ---
+# One process-wide registry (module state survives Streamlit reruns). Spans record
+# latencies, model calls record batch sizes, LRU caches are read at export time.
+# Histograms keep cumulative Prometheus buckets plus a window of recent samples,
+# which gives exact p50/p95/p99 over recent traffic.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_BUCKETS = (1, 8, 64, 512, 4096, 32_768, 262_144, 2_097_152)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    def __init__(self, buckets, window=2048):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def summary(self):
+        recent = np.array(self.recent) if self.recent else np.zeros(1)
+        quantiles = np.percentile(recent, [q * 100 for q in QUANTILES])
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            **{f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, quantiles)},
+            "max": float(recent.max()),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.spans = {}
+        self.batches = {}
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    def observe_span(self, name, seconds):
+        with self._lock:
+            self.spans.setdefault(name, Histogram(LATENCY_BUCKETS)).observe(seconds)
+
+    def observe_batch(self, name, size):
+        with self._lock:
+            self.batches.setdefault(name, Histogram(BATCH_BUCKETS)).observe(size)
+
+    def register_cache(self, name, cache):
+        # Anything with an LRUCache-style stats() method
+        self.caches[name] = cache
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_span(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            spans = {name: h.summary() for name, h in self.spans.items()}
+            batches = {name: h.summary() for name, h in self.batches.items()}
+        return {
+            "timestamp": time.time(),
+            "spans_seconds": spans,
+            "batch_sizes": batches,
+            "caches": {name: cache.stats() for name, cache in self.caches.items()},
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            families = [("cr_span_seconds", "span", self.spans), ("cr_model_batch_size", "call", self.batches)]
+            for metric, label, histograms in families:
+                lines.append(f"# TYPE {metric} histogram")
+                for name, h in sorted(histograms.items()):
+                    cumulative = 0
+                    for le, n in zip(list(h.buckets) + ["+Inf"], h.bucket_counts):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{{label}="{name}",le="{le}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label}="{name}"}} {h.total}')
+                    lines.append(f'{metric}_count{{{label}="{name}"}} {h.count}')
+
+        stats = {name: cache.stats() for name, cache in sorted(self.caches.items())}
+        for metric, key, kind in (("cr_cache_hits_total", "hits", "counter"), ("cr_cache_misses_total", "misses", "counter"),
+                                  ("cr_cache_size", "size", "gauge")):
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(f'{metric}{{cache="{name}"}} {s[key]}' for name, s in stats.items())
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Atomic swap so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def append_json_log(self, path):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.to_json() + "\n")
+
+
+METRICS = MetricsRegistry()
+
+
+class InstrumentedOracle:
+    # Pass-through wrapper recording the batch size of every model call
+    def __init__(self, oracle, registry=METRICS):
+        self.oracle = oracle
+        self.registry = registry
+
+    def __getattr__(self, name):
+        return getattr(self.oracle, name)
+
+    def embed(self, decks):
+        self.registry.observe_batch("embed", len(decks))
+        return self.oracle.embed(decks)
+
+    def score_against(self, opponent_deck, meta_projection):
+        self.registry.observe_batch("score_against", len(meta_projection))
+        return self.oracle.score_against(opponent_deck, meta_projection)
+
+    def score_many(self, decks, meta_projection):
+        self.registry.observe_batch("score_many", len(decks) * len(meta_projection))
+        return self.oracle.score_many(decks, meta_projection)
+
+    def predict_pairs(self, decks1, decks2):
+        self.registry.observe_batch("predict_pairs", len(decks1))
+        return self.oracle.predict_pairs(decks1, decks2)
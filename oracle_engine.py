@@ -0,0 +1,229 @@
+import time
+
+import numpy as np
+
+# The Oracle network: a shared card embedding averaged per deck (one "tower" per
+# player), concatenated [player1, player2] and fed to a small dense head that
+# outputs P(player 2 wins). Because the first dense layer is linear in the
+# concatenation, each tower's share of it can be computed separately, so meta
+# decks are embedded and projected once and only the opponent side runs per query.
+
+
+def encode_decks(decks, card_to_idx):
+    # Raw card ids -> model indices (ids below 500 are already indices)
+    return np.array(
+        [[card_to_idx.get(c, 0) if c > 500 else c for c in deck] for deck in decks],
+        dtype=np.int32
+    )
+
+
+def encode_card_array(raw_ids, card_to_idx):
+    # Vectorized encode_decks for an integer array of any shape (same rule, same result)
+    raw_ids = np.asarray(raw_ids, dtype=np.int64)
+    keys = np.array(sorted(card_to_idx), dtype=np.int64)
+    values = np.array([card_to_idx[k] for k in keys], dtype=np.int32)
+    pos = np.clip(np.searchsorted(keys, raw_ids), 0, len(keys) - 1)
+    mapped = np.where(keys[pos] == raw_ids, values[pos], 0)
+    return np.where(raw_ids > 500, mapped, raw_ids).astype(np.int32)
+
+
+class KerasOracle:
+    def __init__(self, model, batch_size=8192):
+        import tensorflow as tf
+
+        if len(model.inputs) != 2:
+            raise ValueError("Neural Network Architecture Mismatch! Expected 2-Input model.")
+
+        embedding = next(l for l in model.layers if isinstance(l, tf.keras.layers.Embedding))
+        dense_layers = [l for l in model.layers if isinstance(l, tf.keras.layers.Dense)]
+
+        self.model = model
+        self.batch_size = batch_size
+        self.embedding_dim = embedding.output_dim
+
+        deck_input = tf.keras.Input(shape=(8,))
+        pooled = tf.keras.layers.GlobalAveragePooling1D()(embedding(deck_input))
+        self.tower = tf.keras.Model(deck_input, pooled)
+
+        first = dense_layers[0]
+        self.first_kernel, self.first_bias = first.get_weights()
+        self.first_activation = first.activation
+
+        hidden_input = tf.keras.Input(shape=(self.first_kernel.shape[1],))
+        x = hidden_input
+        for layer in dense_layers[1:]:
+            x = layer(x)
+        self.head = tf.keras.Model(hidden_input, x)
+
+    def embed(self, decks):
+        return self.tower.predict(np.asarray(decks, dtype=np.int32), batch_size=self.batch_size, verbose=0)
+
+    def project_meta(self, meta_embeddings):
+        # Player-2 half of the first dense layer, cached per meta pool
+        return meta_embeddings @ self.first_kernel[self.embedding_dim:]
+
+    def score_against(self, opponent_deck, meta_projection):
+        # P(meta deck wins) for one opponent against every cached meta deck
+        # Direct calls: predict() setup costs more than this whole forward pass
+        opponent_embedding = np.asarray(self.tower(np.asarray([opponent_deck], dtype=np.int32), training=False))
+        opponent_projection = opponent_embedding @ self.first_kernel[:self.embedding_dim] + self.first_bias
+        hidden = self.first_activation(meta_projection + opponent_projection)
+        return np.asarray(self.head(hidden, training=False)).ravel()
+
+    def score_many(self, decks, meta_projection):
+        # (len(decks), n_meta) matrix of P(meta deck wins), one row per deck
+        embeddings = np.asarray(self.tower(np.asarray(decks, dtype=np.int32), training=False))
+        projections = embeddings @ self.first_kernel[:self.embedding_dim] + self.first_bias
+        hidden = self.first_activation(meta_projection[None, :, :] + projections[:, None, :])
+        flat = np.asarray(self.head(np.reshape(hidden, (-1, hidden.shape[-1])), training=False))
+        return flat.reshape(len(projections), -1)
+
+    def predict_pairs(self, decks1, decks2):
+        # Full network: P(player 2 wins) for each (decks1[i], decks2[i])
+        inputs = [np.asarray(decks1, dtype=np.int32), np.asarray(decks2, dtype=np.int32)]
+        return self.model.predict(inputs, batch_size=self.batch_size, verbose=0).ravel()
+
+
+# --- TENSORFLOW-FREE INFERENCE ---
+WEIGHTS_FILE = "clash_royale_nn_weights.npz"
+
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 0.5 * (1 + np.tanh(0.5 * x)),
+    "linear": lambda x: x,
+}
+
+
+def export_weights(model, path=WEIGHTS_FILE):
+    # Dump a Keras Oracle model to the .npz read by NumpyOracle
+    import tensorflow as tf
+
+    embedding = next(l for l in model.layers if isinstance(l, tf.keras.layers.Embedding))
+    dense_layers = [l for l in model.layers if isinstance(l, tf.keras.layers.Dense)]
+    arrays = {"embedding": embedding.get_weights()[0]}
+    for i, layer in enumerate(dense_layers):
+        arrays[f"kernel_{i}"], arrays[f"bias_{i}"] = layer.get_weights()
+    arrays["activations"] = np.array([layer.activation.__name__ for layer in dense_layers])
+    np.savez(path, **arrays)
+
+
+class NumpyOracle:
+    def __init__(self, embedding, kernels, biases, activations):
+        self.embedding = embedding.astype(np.float32)
+        self.embedding_dim = embedding.shape[1]
+        self.layers = [
+            (k.astype(np.float32), b.astype(np.float32), ACTIVATIONS[a])
+            for k, b, a in zip(kernels, biases, activations)
+        ]
+
+    @classmethod
+    def load(cls, path=WEIGHTS_FILE):
+        with np.load(path) as data:
+            n_layers = len(data["activations"])
+            return cls(
+                data["embedding"],
+                [data[f"kernel_{i}"] for i in range(n_layers)],
+                [data[f"bias_{i}"] for i in range(n_layers)],
+                [str(a) for a in data["activations"]],
+            )
+
+    def embed(self, decks):
+        return self.embedding[np.asarray(decks)].mean(axis=1)
+
+    def project_meta(self, meta_embeddings):
+        kernel = self.layers[0][0]
+        return meta_embeddings @ kernel[self.embedding_dim:]
+
+    def _head(self, hidden):
+        for kernel, bias, activation in self.layers[1:]:
+            hidden = activation(hidden @ kernel + bias)
+        return hidden.ravel()
+
+    def score_against(self, opponent_deck, meta_projection):
+        kernel, bias, activation = self.layers[0]
+        opponent_projection = self.embed([opponent_deck]) @ kernel[:self.embedding_dim] + bias
+        return self._head(activation(meta_projection + opponent_projection))
+
+    def score_many(self, decks, meta_projection):
+        kernel, bias, activation = self.layers[0]
+        projections = self.embed(decks) @ kernel[:self.embedding_dim] + bias
+        hidden = activation(meta_projection[None, :, :] + projections[:, None, :])
+        return self._head(hidden.reshape(-1, hidden.shape[-1])).reshape(len(projections), -1)
+
+    def predict_pairs(self, decks1, decks2):
+        kernel, bias, activation = self.layers[0]
+        joined = np.concatenate([self.embed(decks1), self.embed(decks2)], axis=1)
+        return self._head(activation(joined @ kernel + bias))
+
+
+def build_meta_cache(oracle, meta_pool, card_to_idx):
+    # Encode the meta pool once and precompute its tower output
+    meta_batch = encode_decks(meta_pool, card_to_idx)
+    meta_projection = oracle.project_meta(oracle.embed(meta_batch))
+    return meta_batch, meta_projection
+
+
+def win_rate_vs_pool(oracle, decks, meta_projection, batch_size=65_536):
+    # Mean P(deck wins) against every cached meta deck, scoring ~batch_size pairs per call
+    decks = np.asarray(decks)
+    rows = max(1, batch_size // len(meta_projection))
+    return np.concatenate([
+        1 - oracle.score_many(decks[lo:lo + rows], meta_projection).mean(axis=1)
+        for lo in range(0, len(decks), rows)
+    ])
+
+
+# --- COUNTER-DECK SEARCH BEYOND THE META POOL ---
+def single_swaps(decks, n_cards):
+    # Every deck reachable by replacing one card with one not already in it
+    n_decks = len(decks)
+    swapped = np.repeat(decks[:, None, None, :], 8, axis=1).repeat(n_cards, axis=2)
+    slots = np.arange(8)
+    swapped[:, slots, :, slots] = np.arange(n_cards)
+    already_in = (decks[:, :, None] == np.arange(n_cards)).any(axis=1)
+    valid = ~np.broadcast_to(already_in[:, None, :], (n_decks, 8, n_cards))
+    return swapped[valid]
+
+
+def search_counter_deck(oracle, opponent_deck, meta_batch, meta_projection, n_cards,
+                        time_budget=1.0, beam_width=32, max_swaps=2, batch_size=65_536):
+    # Beam search from the best meta decks over single/double card swaps, scoring
+    # large candidate batches per model call until the time budget runs out
+    start = time.perf_counter()
+    pool_scores = oracle.score_against(opponent_deck, meta_projection)
+    top = np.argsort(-pool_scores)[:beam_width]
+    beam, beam_scores = np.sort(meta_batch[top], axis=1), pool_scores[top]
+
+    visited = {deck.tobytes() for deck in np.sort(meta_batch, axis=1)}
+    best_deck, best_score = beam[0], beam_scores[0]
+    n_scored = len(meta_batch)
+
+    for _ in range(max_swaps):
+        candidates = np.unique(np.sort(single_swaps(beam, n_cards), axis=1), axis=0)
+        fresh = np.array([deck.tobytes() not in visited for deck in candidates], dtype=bool)
+        candidates = candidates[fresh]
+        visited.update(deck.tobytes() for deck in candidates)
+
+        scores = []
+        for lo in range(0, len(candidates), batch_size):
+            if time.perf_counter() - start > time_budget:
+                break
+            batch = candidates[lo:lo + batch_size]
+            scores.append(oracle.score_against(opponent_deck, oracle.project_meta(oracle.embed(batch))))
+        if not scores:
+            break
+        scores = np.concatenate(scores)
+        candidates = candidates[:len(scores)]
+        n_scored += len(scores)
+
+        pooled = np.concatenate([beam, candidates])
+        pooled_scores = np.concatenate([beam_scores, scores])
+        keep = np.argsort(-pooled_scores)[:beam_width]
+        beam, beam_scores = pooled[keep], pooled_scores[keep]
+        if beam_scores[0] > best_score:
+            best_deck, best_score = beam[0], beam_scores[0]
+        if time.perf_counter() - start > time_budget:
+            break
+
+    stats = {"scored": n_scored, "elapsed": time.perf_counter() - start}
+    return best_deck, best_score, stats
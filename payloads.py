@@ -0,0 +1,70 @@
+import os
+import json
+import base64
+import hashlib
+
+import numpy as np
+
+# --- PRECOMPOSED HTML / CSS PAYLOADS ---
+# The optimizer page and the app CSS embed several megabytes of assets. They are
+# composed once per process (see the cached loaders in app.py); asset_signature is
+# part of the cache key so edited files are picked up without a restart.
+OPTIMIZER_TEMPLATE = "optimizer.html"
+
+
+def asset_signature(paths):
+    # Cheap change detector: (path, mtime, size) per file, None when missing
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def data_uri(path, mime):
+    try:
+        with open(path, "rb") as f:
+            return f"data:{mime};base64,{base64.b64encode(f.read()).decode()}"
+    except FileNotFoundError:
+        return None
+
+
+def compact_json(obj):
+    # Minified, and safe to inline inside a <script> block
+    return json.dumps(obj, separators=(",", ":")).replace("</", "<\\/")
+
+
+def optimizer_card_data(card_data_file):
+    # The optimizer only reads each card's name and image key
+    with open(card_data_file, "r", encoding="utf-8") as f:
+        return [{"name": card["name"], "key": card["key"]} for card in json.load(f)]
+
+
+def synergy_payload(synergy_df, decimals=5):
+    return {
+        "cards": [str(c) for c in synergy_df.columns],
+        "matrix": np.round(synergy_df.to_numpy(dtype=np.float64), decimals).tolist(),
+    }
+
+
+def compose_optimizer_html(template, cards=None, synergy=None, background_uri=None, font_uri=None):
+    html = template
+    if cards is not None:
+        html = html.replace("const EMBEDDED_CARDS = null;", f"const EMBEDDED_CARDS = {compact_json(cards)};")
+    if synergy is not None:
+        html = html.replace("const EMBEDDED_SYNERGY = null;", f"const EMBEDDED_SYNERGY = {compact_json(synergy)};")
+    if background_uri:
+        # Embedded once: the page background is fully covered by the blurred .bg-blur layer
+        html = html.replace('url("newWallpaper1.jpg")', "none")
+        html = html.replace('"foranalytics.jpg"', f'"{background_uri}"')
+    if font_uri:
+        html = html.replace('"Clash_Regular.otf"', f'"{font_uri}"')
+    return html
+
+
+def payload_info(text):
+    encoded = text.encode("utf-8")
+    return {"hash": hashlib.sha256(encoded).hexdigest()[:12], "bytes": len(encoded)}
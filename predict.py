@@ -0,0 +1,202 @@
+import argparse
+import itertools
+import json
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from battle_store import CARD_MAPPING_FILE, P1_CARD_COLUMNS, P2_CARD_COLUMNS
+from oracle_engine import KerasOracle, NumpyOracle, WEIGHTS_FILE, encode_card_array
+from synergy import load_card_names
+
+# Headless Battle Predictor: streams a file of deck pairs through the Oracle in large
+# fixed-size batches and writes P(win) per row, so files far bigger than memory work.
+#   python predict.py matchups.csv --out predictions.csv [--batch-size 65536]
+#   python predict.py scouting.jsonl --out predictions.jsonl
+# CSV input: the archive's Card1-1..Card1-8 / Card2-1..Card2-8 columns, or `deck1` / `deck2`
+# columns of ';'-separated cards. JSONL input: {"deck1": [...], "deck2": [...]} per line.
+# Cards are names or raw ids, encoded exactly as the Battle Predictor tab does; every other
+# column / key is passed through. Output adds p1_win_prob, p2_win_prob and error: rows with
+# a card missing from card_mapping.pkl, a repeated card or a deck of other than 8 cards are
+# reported there and not scored.
+KERAS_MODEL_FILE = "clash_royale_nn_model.keras"
+DECK_SEPARATOR = ";"
+
+# Cards the app adds by hand because cards_i18n.json predates them
+EXTRA_CARD_NAMES = {"Little Prince": 26000093}
+
+
+def load_oracle(weights_file=WEIGHTS_FILE, model_file=KERAS_MODEL_FILE):
+    # Same preference as the app: NumPy forward pass, else the Keras model
+    try:
+        return NumpyOracle.load(weights_file)
+    except FileNotFoundError:
+        pass
+    import tensorflow as tf
+    return KerasOracle(tf.keras.models.load_model(model_file))
+
+
+def card_name_index(card_data_file="cards_i18n.json"):
+    name_to_id = {name: card_id for card_id, name in load_card_names(card_data_file).items()}
+    name_to_id.update(EXTRA_CARD_NAMES)
+    # Exact names first, lower-case spellings as a fallback
+    return {**{name.lower(): card_id for name, card_id in name_to_id.items()}, **name_to_id}
+
+
+def resolve_cards(values, name_to_id):
+    # (N, 8) card names and/or raw ids -> int64 raw ids, -1 where a card is unknown or missing
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64)
+    text = pd.Series(values.ravel()).astype(str).str.strip()
+    ids = text.map(name_to_id)
+    unnamed = ids.isna()
+    ids[unnamed] = text[unnamed].str.lower().map(name_to_id)
+    unnamed = ids.isna()
+    ids[unnamed] = pd.to_numeric(text[unnamed], errors='coerce')
+    return ids.fillna(-1).to_numpy(dtype=np.int64).reshape(values.shape)
+
+
+def valid_decks(raw, known_ids):
+    # Rows of 8 distinct cards, every one of them in the model's mapping
+    distinct = (np.diff(np.sort(raw, axis=1), axis=1) != 0).all(axis=1)
+    return np.isin(raw, known_ids).all(axis=1) & distinct
+
+
+def predict_decks(oracle, card_to_idx, p1_raw, p2_raw, sized=None):
+    # P(player 2 wins) per row, NaN with a reason for rows that cannot be encoded.
+    # sized: False where the input deck did not list exactly 8 cards
+    sized = np.ones(len(p1_raw), dtype=bool) if sized is None else np.asarray(sized)
+    known_ids = np.fromiter(card_to_idx, dtype=np.int64, count=len(card_to_idx))
+    encodable = valid_decks(p1_raw, known_ids) & valid_decks(p2_raw, known_ids)
+    valid = sized & encodable
+    probs = np.full(len(p1_raw), np.nan)
+    if valid.any():
+        # Sorted like canonical_deck, so results equal the tab's cached predictions
+        p1 = np.sort(encode_card_array(p1_raw[valid], card_to_idx), axis=1)
+        p2 = np.sort(encode_card_array(p2_raw[valid], card_to_idx), axis=1)
+        probs[valid] = oracle.predict_pairs(p1, p2)
+    errors = np.select([~sized, ~encodable], ["wrong card count", "unknown or missing card"], default="")
+    return probs, errors
+
+
+# --- STREAMING READERS ---
+def deck_cells(decks):
+    # List-valued decks -> (N, 8) cells and whether each held exactly 8 cards;
+    # other sizes are left blank here and reported by predict_decks, never truncated
+    cells = np.full((len(decks), 8), "", dtype=object)
+    sized = np.array([len(deck) == 8 for deck in decks], dtype=bool)
+    for row in np.flatnonzero(sized):
+        cells[row] = list(decks[row])
+    return cells, sized
+
+
+def split_deck_column(column):
+    return deck_cells([[card for card in str(deck).split(DECK_SEPARATOR) if card.strip()] for deck in column])
+
+
+def iter_csv_batches(path, batch_size):
+    # (passthrough frame, p1 cards, p2 cards, 8 cards on both sides) per batch
+    # Card columns holding only ids parse straight to int64 and skip the name lookup
+    for frame in pd.read_csv(path, chunksize=batch_size, keep_default_na=False):
+        if set(P1_CARD_COLUMNS + P2_CARD_COLUMNS) <= set(frame.columns):
+            p1, p2 = frame[P1_CARD_COLUMNS].to_numpy(), frame[P2_CARD_COLUMNS].to_numpy()
+            sized = np.ones(len(frame), dtype=bool)
+        elif {"deck1", "deck2"} <= set(frame.columns):
+            (p1, p1_sized), (p2, p2_sized) = split_deck_column(frame["deck1"]), split_deck_column(frame["deck2"])
+            sized = p1_sized & p2_sized
+        else:
+            raise SystemExit("CSV input needs Card1-1..Card2-8 or deck1/deck2 columns.")
+        yield frame, p1, p2, sized
+
+
+def iter_jsonl_batches(path, batch_size):
+    with (sys.stdin if path == "-" else open(path, "r", encoding="utf-8")) as f:
+        lines = (line for line in f if line.strip())
+        while True:
+            records = [json.loads(line) for line in itertools.islice(lines, batch_size)]
+            if not records:
+                return
+            p1, p1_sized = deck_cells([list(r.get("deck1") or []) for r in records])
+            p2, p2_sized = deck_cells([list(r.get("deck2") or []) for r in records])
+            yield records, p1, p2, p1_sized & p2_sized
+
+
+# --- STREAMING WRITERS ---
+# Both write bytes; Arrow's CSV writer is ~10x faster than DataFrame.to_csv here
+def write_csv_batch(out, frame, probs, errors, first):
+    frame = frame.assign(p1_win_prob=np.round(1 - probs, 6), p2_win_prob=np.round(probs, 6), error=errors)
+    options = pa_csv.WriteOptions(include_header=first)
+    pa_csv.write_csv(pa.Table.from_pandas(frame, preserve_index=False), out, options)
+
+
+def write_jsonl_batch(out, records, probs, errors, first):
+    lines = []
+    for record, prob, error in zip(records, probs, errors):
+        if error:
+            record = dict(record, p1_win_prob=None, p2_win_prob=None, error=error)
+        else:
+            record = dict(record, p1_win_prob=round(1 - float(prob), 6), p2_win_prob=round(float(prob), 6))
+        lines.append(json.dumps(record) + "\n")
+    out.write("".join(lines).encode("utf-8"))
+
+
+def run(path, out, oracle, card_to_idx, name_to_id, batch_size=65_536, fmt="csv", log=sys.stderr):
+    batches = iter_jsonl_batches(path, batch_size) if fmt == "jsonl" else iter_csv_batches(path, batch_size)
+    write_batch = write_jsonl_batch if fmt == "jsonl" else write_csv_batch
+    start = time.perf_counter()
+    totals = {"rows": 0, "skipped": 0, "model_s": 0.0}
+
+    for i, (rows, p1_cards, p2_cards, sized) in enumerate(batches):
+        p1_raw, p2_raw = resolve_cards(p1_cards, name_to_id), resolve_cards(p2_cards, name_to_id)
+        model_start = time.perf_counter()
+        probs, errors = predict_decks(oracle, card_to_idx, p1_raw, p2_raw, sized)
+        totals["model_s"] += time.perf_counter() - model_start
+        write_batch(out, rows, probs, errors, first=i == 0)
+
+        totals["rows"] += len(probs)
+        totals["skipped"] += int((errors != "").sum())
+        elapsed = time.perf_counter() - start
+        print(f"\r{totals['rows']:,} matchups · {totals['rows'] / elapsed:,.0f} matchups/sec", end="", file=log)
+
+    totals["elapsed_s"] = time.perf_counter() - start
+    totals["matchups_per_s"] = totals["rows"] / totals["elapsed_s"] if totals["elapsed_s"] else 0.0
+    print(file=log)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict winners for a file of deck pairs without the UI.")
+    parser.add_argument("input", help="CSV or JSONL of deck pairs ('-' reads stdin).")
+    parser.add_argument("--out", default="-", help="Output path (default: stdout).")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Default: from the input extension.")
+    parser.add_argument("--batch-size", type=int, default=65_536, help="Matchups per model call.")
+    parser.add_argument("--weights", default=WEIGHTS_FILE)
+    parser.add_argument("--model", default=KERAS_MODEL_FILE)
+    parser.add_argument("--mapping", default=CARD_MAPPING_FILE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.input.endswith((".jsonl", ".ndjson")) else "csv")
+    oracle = load_oracle(args.weights, args.model)
+    with open(args.mapping, "rb") as f:
+        card_to_idx = pickle.load(f)
+
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    try:
+        totals = run(sys.stdin if args.input == "-" and fmt == "csv" else args.input, out, oracle,
+                     card_to_idx, card_name_index(), args.batch_size, fmt)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"Predicted {totals['rows']:,} matchups in {totals['elapsed_s']:.1f}s "
+          f"({totals['matchups_per_s']:,.0f} matchups/sec, model {totals['model_s']:.1f}s, "
+          f"{totals['skipped']:,} skipped)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
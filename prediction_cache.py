@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def canonical_deck(deck):
+    # Card order inside a deck never changes a prediction (the model averages embeddings)
+    return tuple(sorted(int(c) for c in deck))
+
+
+class LRUCache:
+    # Bounded, thread-safe LRU map with hit/miss counters. Streamlit serves every
+    # session from threads of one process, so a single instance is shared by all users.
+    def __init__(self, maxsize=50_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def cached_matchup_probability(cache, oracle, deck1, deck2):
+    # P(deck2 wins) for model-encoded decks, computed at most once per canonical pair
+    key = (canonical_deck(deck1), canonical_deck(deck2))
+    prob = cache.get(key)
+    if prob is None:
+        prob = float(oracle.predict_pairs(np.array([key[0]]), np.array([key[1]]))[0])
+        cache.put(key, prob)
+    return prob
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from anti_meta import one_hot_decks
+
+# --- CARD-PAIR SYNERGY FROM BATTLE DATA ---
+# With X the one-hot deck matrix of a chunk, X.T @ X counts how often two cards were
+# played together and X.T @ diag(won) @ X how often that pair won. The diagonals are
+# the per-card totals, so a single streaming pass gives everything synergy needs:
+#   synergy[a, b] = wr(a and b together) - (wr(a) + wr(b)) / 2
+SYNERGY_FILE = "synergy_datasetFinal.csv"
+CARD_DATA_FILE = "cards_i18n.json"
+
+
+def build_pair_table(p1_decks, p2_decks, p1_won, n_cards, chunk_size=200_000):
+    # pair_wins[a, b] / pair_matches[a, b] over the decks of both players.
+    # Chunks are sliced from (possibly memory-mapped) arrays, so memory stays bounded.
+    pair_wins = np.zeros((n_cards, n_cards), dtype=np.int64)
+    pair_matches = np.zeros((n_cards, n_cards), dtype=np.int64)
+    p1_won = np.asarray(p1_won)
+
+    for start in range(0, len(p1_decks), chunk_size):
+        stop = start + chunk_size
+        won = p1_won[start:stop].astype(np.float32)
+        for decks, deck_won in ((p1_decks, won), (p2_decks, 1 - won)):
+            x = one_hot_decks(decks[start:stop], n_cards)
+            pair_matches += np.rint(x.T @ x).astype(np.int64)
+            pair_wins += np.rint((x * deck_won[:, None]).T @ x).astype(np.int64)
+    return pair_wins, pair_matches
+
+
+def synergy_scores(pair_wins, pair_matches, min_matches=100):
+    # Pairs seen fewer than `min_matches` times (and the diagonal) score 0
+    card_wr = np.divide(np.diag(pair_wins), np.diag(pair_matches),
+                        out=np.full(len(pair_wins), 0.5), where=np.diag(pair_matches) > 0)
+    eligible = pair_matches >= min_matches
+    pair_wr = np.divide(pair_wins, pair_matches, out=np.zeros(pair_wins.shape), where=eligible)
+    scores = np.where(eligible, pair_wr - (card_wr[:, None] + card_wr[None, :]) / 2, 0.0)
+    np.fill_diagonal(scores, 0.0)
+    return scores
+
+
+def load_card_names(card_data_file=CARD_DATA_FILE):
+    with open(card_data_file, "r", encoding="utf-8") as f:
+        return {card['id']: card['name'] for card in json.load(f)}
+
+
+def synergy_frame(scores, card_ids, card_names):
+    # Same layout as the shipped matrix: rows/columns ordered by card id, "card" index,
+    # cards missing from the localisation file named Unknown_<id>
+    card_ids = np.asarray(card_ids)
+    order = np.argsort(card_ids, kind='stable')
+    names = [card_names.get(int(c), f"Unknown_{int(c)}") for c in card_ids[order]]
+    frame = pd.DataFrame(scores[np.ix_(order, order)], index=names, columns=names)
+    frame.index.name = "card"
+    return frame
+
+
+def synergy_card_ids(columns, name_to_id):
+    # Inverse of synergy_frame's naming; -1 for names that cannot be resolved
+    return np.array([
+        int(col[len("Unknown_"):]) if col.startswith("Unknown_") else name_to_id.get(col, -1)
+        for col in columns
+    ], dtype=np.int64)
+
+
+def write_synergy_matrix(pair_wins, pair_matches, card_ids, path=SYNERGY_FILE,
+                         min_matches=100, card_data_file=CARD_DATA_FILE):
+    scores = synergy_scores(pair_wins, pair_matches, min_matches)
+    frame = synergy_frame(scores, card_ids, load_card_names(card_data_file))
+    frame.to_csv(path)
+    return frame
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Tests import the app's flat modules and read its data files from the repo root
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.chdir(REPO_DIR)
+
+from battle_store import BATTLE_ARCHIVE, encode_battles, load_battles  # noqa: E402
+from benchmarks.synthetic_battles import synthetic_battles  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def battles():
+    # 50k synthetic battles, encoded exactly like the store
+    rng = np.random.default_rng(7)
+    card_ids = np.arange(26000000, 26000110, dtype=np.int64)
+    frame = synthetic_battles(50_000, rng, card_ids, n_archetypes=2_000, missing_rate=0.0)
+    return encode_battles(frame, card_ids)
+
+
+@pytest.fixture(scope="session")
+def day_battles():
+    # The bundled daily dump (or its store); skipped where the data is not checked out
+    battles = load_battles(BATTLE_ARCHIVE)
+    if battles is None:
+        pytest.skip(f"'{BATTLE_ARCHIVE}' not available")
+    return battles
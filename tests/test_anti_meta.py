@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from anti_meta import best_counter, build_matchup_table, matchup_baseline, tally_card_wins
+
+
+def test_matchup_table_matches_battle_loop(battles):
+    n = 2_000
+    p1_decks, p2_decks = battles["p1_decks"][:n], battles["p2_decks"][:n]
+    p1_won = (battles["crowns1"][:n] > battles["crowns2"][:n]).astype(np.int64)
+    n_cards = len(battles["card_ids"])
+    wins, matches = build_matchup_table(p1_decks, p2_decks, p1_won, n_cards, chunk_size=300)
+
+    expected_wins = np.zeros((n_cards, n_cards), dtype=np.int64)
+    expected_matches = np.zeros_like(expected_wins)
+    for d1, d2, won in zip(p1_decks, p2_decks, p1_won):
+        for a in d1:
+            for b in d2:
+                expected_matches[a, b] += 1
+                expected_matches[b, a] += 1
+                expected_wins[a, b] += won
+                expected_wins[b, a] += 1 - won
+    np.testing.assert_array_equal(matches, expected_matches)
+    np.testing.assert_array_equal(wins, expected_wins)
+
+
+def test_matchup_baseline_is_card_win_rate(battles):
+    # The Hard Counters views rank on this baseline; it must be each card's own win rate
+    p1_won = (battles["crowns1"] > battles["crowns2"]).astype(np.int64)
+    n_cards = len(battles["card_ids"])
+    wins, matches = build_matchup_table(battles["p1_decks"], battles["p2_decks"], p1_won, n_cards)
+    p1_wins, p1_matches = tally_card_wins(battles["p1_decks"], p1_won, n_cards)
+    p2_wins, p2_matches = tally_card_wins(battles["p2_decks"], 1 - p1_won, n_cards)
+    card_wr = (p1_wins + p2_wins) / (p1_matches + p2_matches)
+    np.testing.assert_allclose(matchup_baseline(wins, matches), card_wr)
+
+
+def test_hated_card_is_never_its_own_counter(battles):
+    p1_won = (battles["crowns1"] > battles["crowns2"]).astype(np.int64)
+    n_cards = len(battles["card_ids"])
+    wins, matches = build_matchup_table(battles["p1_decks"], battles["p2_decks"], p1_won, n_cards)
+    # Mirror matches count once per side, so a card's record against itself is exactly even
+    np.testing.assert_array_equal(2 * np.diag(wins), np.diag(matches))
+
+    # So a below-average card's mirror delta (0.5 - its baseline) can beat every real counter
+    hated, wins, matches = 0, np.array([500, 550, 480]), np.array([1000, 1000, 1000])
+    baseline = np.array([0.35, 0.5, 0.5])
+    assert best_counter(wins, matches, baseline)[0] == hated
+    card, delta, win_rate = best_counter(wins, matches, baseline, exclude=hated)
+    assert (card, win_rate) == (1, 0.55)
+    assert delta == pytest.approx(0.05)
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+from archetypes import (
+    ARCHETYPES, BALLOON_ID, GOLEM_ID, HOG_ID, LAVA_ID, X_BOW_ID, WIN_CONDITION_BITS, archetype_matchups,
+    card_lookup, classify_chunk, load_archetype_matchups, save_archetype_matchups
+)
+from battle_store import archive_signature
+from card_stats import load_card_info
+
+
+def reference_archetype(deck_ids, card_info):
+    # The Battle Predictor's original per-card rules (get_deck_metadata), one deck at a time
+    card_set = set(deck_ids)
+    type_count = {"Troop": 0, "Spell": 0, "Building": 0}
+    total_elixir = heavy_cards = cheap_cards = 0
+    for card in deck_ids:
+        t = card_info.get(card, {}).get("type", "Troop")
+        type_count[t] = type_count.get(t, 0) + 1
+        elx = card_info.get(card, {}).get("elixir", 0)
+        total_elixir += elx
+        heavy_cards += elx >= 5
+        cheap_cards += elx <= 2
+    avg_elixir = total_elixir / 8
+    spell, building = type_count["Spell"], type_count["Building"]
+
+    if HOG_ID in card_set and avg_elixir <= 3.3:
+        return "Hog Cycle", avg_elixir
+    if GOLEM_ID in card_set and avg_elixir >= 4.0:
+        return "Golem Beatdown", avg_elixir
+    if LAVA_ID in card_set and BALLOON_ID in card_set:
+        return "LavaLoon", avg_elixir
+    if X_BOW_ID in card_set and building >= 1:
+        return "X-Bow Cycle", avg_elixir
+    if cheap_cards >= 3 and spell >= 2 and avg_elixir <= 3.5:
+        return "Log Bait", avg_elixir
+    if avg_elixir >= 3.9 and heavy_cards >= 2:
+        return "Beatdown", avg_elixir
+    if avg_elixir <= 3.4 and cheap_cards >= 2:
+        return "Cycle", avg_elixir
+    if building >= 1 and avg_elixir <= 3.6:
+        return "Siege", avg_elixir
+    return "Control", avg_elixir
+
+
+def sample_decks(card_ids, n_decks, rng):
+    # Random decks, a third of them seeded with one or two win conditions so every rule fires
+    win_pos = [int(np.flatnonzero(card_ids == card)[0]) for card in WIN_CONDITION_BITS]
+    decks = np.array([rng.choice(len(card_ids), 8, replace=False) for _ in range(n_decks)])
+    for deck in decks[: n_decks // 3]:
+        for card in rng.choice(win_pos, rng.integers(1, 3), replace=False):
+            if card not in deck:
+                deck[rng.integers(8)] = card
+    return decks
+
+
+def test_classify_chunk_matches_reference_rules():
+    card_info = load_card_info()
+    card_ids = np.array(sorted(card_info), dtype=np.int64)
+    decks = sample_decks(card_ids, 3_000, np.random.default_rng(11))
+    meta = classify_chunk(decks, card_lookup(card_ids, card_info))
+
+    labels = [reference_archetype([int(c) for c in card_ids[deck]], card_info) for deck in decks]
+    assert [ARCHETYPES[code] for code in meta["archetype"]] == [name for name, _ in labels]
+    np.testing.assert_allclose(meta["avg_elixir"], [avg for _, avg in labels], rtol=1e-6)
+    assert len(set(meta["archetype"].tolist())) == len(ARCHETYPES)
+
+
+def test_classify_chunk_matches_reference_on_day(day_battles):
+    card_info = load_card_info()
+    card_ids = np.asarray(day_battles["card_ids"])
+    decks = np.asarray(day_battles["p1_decks"][:5_000])
+    meta = classify_chunk(decks, card_lookup(card_ids, card_info))
+    expected = [reference_archetype([int(c) for c in card_ids[deck]], card_info)[0] for deck in decks]
+    assert [ARCHETYPES[code] for code in meta["archetype"]] == expected
+
+
+def test_archetype_matchups_count_both_sides(battles):
+    lookup = card_lookup(battles["card_ids"], load_card_info())
+    wins, matches = archetype_matchups(battles, lookup, chunk_size=7_000)
+    n_battles = len(battles["p1_decks"])
+    assert matches.sum() == 2 * n_battles
+    # Every battle has exactly one winner per perspective pair (draws count for player 2)
+    assert wins.sum() == n_battles
+    np.testing.assert_array_equal(matches, matches.transpose(0, 2, 1))
+
+
+def test_archetype_file_from_another_archive_is_stale(tmp_path, battles):
+    archive = tmp_path / "day.zip"
+    archive.write_bytes(b"first day")
+    path = str(tmp_path / "archetypes.npz")
+    wins, matches = np.zeros((5, 9, 9), dtype=np.int64), np.ones((5, 9, 9), dtype=np.int64)
+    save_archetype_matchups(wins, matches, battles["card_ids"], 100, path, source=archive_signature(archive))
+    assert load_archetype_matchups(path, battles["card_ids"], 100, source=archive_signature(archive)) is not None
+
+    archive.write_bytes(b"second day")
+    os.utime(archive, ns=(0, 10**18))
+    assert load_archetype_matchups(path, battles["card_ids"], 100, source=archive_signature(archive)) is None
+    assert load_archetype_matchups(path, battles["card_ids"], 100) is not None
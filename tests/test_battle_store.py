@@ -0,0 +1,57 @@
+import json
+import os
+
+import numpy as np
+
+from battle_store import archive_signature, load_battles, store_is_current
+from benchmarks.synthetic_battles import write_synthetic_archive
+
+CARD_IDS = np.arange(26000000, 26000110, dtype=np.int64)
+
+
+def test_store_round_trip(tmp_path):
+    archive, store = tmp_path / "day.zip", tmp_path / "store"
+    write_synthetic_archive(archive, 2_000, seed=1, card_ids=CARD_IDS)
+    parsed = load_battles(archive, store)
+    assert not store.exists()
+
+    stored = load_battles(archive, store, persist=True)
+    assert isinstance(stored["p1_decks"], np.memmap)
+    for name in ("p1_decks", "p2_decks", "crowns1", "crowns2", "trophies1", "trophies2"):
+        np.testing.assert_array_equal(stored[name], parsed[name])
+    assert store_is_current(store, archive)
+
+
+def test_replaced_archive_rebuilds_the_store(tmp_path):
+    archive, store = tmp_path / "day.zip", tmp_path / "store"
+    write_synthetic_archive(archive, 2_000, seed=1, card_ids=CARD_IDS)
+    assert len(load_battles(archive, store, persist=True)["p1_decks"]) <= 2_000
+
+    # A new day under the same name
+    write_synthetic_archive(archive, 3_000, seed=2, card_ids=CARD_IDS)
+    os.utime(archive, ns=(1, 1))
+    assert not store_is_current(store, archive)
+    battles = load_battles(archive, store, persist=True)
+    assert len(battles["p1_decks"]) > 2_000
+    assert store_is_current(store, archive)
+    with open(store / "meta.json", encoding="utf-8") as f:
+        assert json.load(f)["source"] == archive_signature(archive)
+    assert not any(p.name.startswith("store.") for p in tmp_path.iterdir())
+
+
+def test_store_without_archive_is_served(tmp_path):
+    archive, store = tmp_path / "day.zip", tmp_path / "store"
+    write_synthetic_archive(archive, 1_000, seed=1, card_ids=CARD_IDS)
+    n_battles = len(load_battles(archive, store, persist=True)["p1_decks"])
+    archive.unlink()
+    assert len(load_battles(archive, store)["p1_decks"]) == n_battles
+
+
+def test_store_from_unknown_source_is_stale(tmp_path):
+    # Stores written before the signature recorded only the file name
+    archive, store = tmp_path / "day.zip", tmp_path / "store"
+    write_synthetic_archive(archive, 1_000, seed=1, card_ids=CARD_IDS)
+    load_battles(archive, store, persist=True)
+    meta = json.loads((store / "meta.json").read_text())
+    (store / "meta.json").write_text(json.dumps(dict(meta, source="day.zip")))
+    assert not store_is_current(store, archive)
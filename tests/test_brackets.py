@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+
+from battle_store import archive_signature
+from brackets import (
+    BRACKET_EDGES, battle_brackets, bracket_aggregates, load_bracket_aggregates, save_bracket_aggregates
+)
+from ingest import aggregate_battles, merge_aggregates, winning_deck_summary
+
+
+@pytest.fixture(scope="module")
+def subset(battles):
+    return {name: (values if name == "card_ids" else values[:5_000]) for name, values in battles.items()}
+
+
+def test_bracket_file_from_another_archive_is_stale(tmp_path, subset):
+    archive = tmp_path / "day.zip"
+    archive.write_bytes(b"first day")
+    path = str(tmp_path / "brackets.npz")
+    save_bracket_aggregates(bracket_aggregates(subset), winning_deck_summary(subset), path,
+                            source=archive_signature(archive))
+    card_ids, n_battles = subset["card_ids"], len(subset["p1_decks"])
+    assert load_bracket_aggregates(path, card_ids, n_battles, source=archive_signature(archive)) is not None
+
+    # Same battle count and vocabulary, different archive
+    archive.write_bytes(b"second day")
+    os.utime(archive, ns=(0, 10**18))
+    assert load_bracket_aggregates(path, card_ids, n_battles, source=archive_signature(archive)) is None
+    # With no archive to compare against (a deployment shipping only the tables) it is served
+    assert load_bracket_aggregates(path, card_ids, n_battles) is not None
+
+
+def test_brackets_sum_to_the_whole_day(battles):
+    day = aggregate_battles(battles, pair_tables=False)
+    segments = bracket_aggregates(battles)
+    assert len(segments) == len(BRACKET_EDGES) + 1
+    assert all(seg["n_battles"] > 0 for seg in segments)
+    merged = merge_aggregates(segments)
+    for name in ("n_battles", "card_wins", "card_matches", "matchup_wins", "matchup_matches"):
+        np.testing.assert_array_equal(merged[name], day[name], err_msg=name)
+
+    # Each battle lands in exactly one bracket, by its players' mean trophies
+    brackets = battle_brackets(battles["trophies1"], battles["trophies2"])
+    assert [int(seg["n_battles"]) for seg in segments] == np.bincount(brackets, minlength=len(segments)).tolist()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from deck_masks import build_pool_index, count_unique_masks, deck_masks, masks_to_decks, query_pool
+
+N_CARDS = 110
+
+
+@pytest.fixture(scope="module")
+def pool():
+    # 3,000 distinct sorted decks over 110 cards (both mask words in use), best first
+    rng = np.random.default_rng(13)
+    decks = np.unique(np.sort([rng.choice(N_CARDS, 8, replace=False) for _ in range(3_000)], axis=1), axis=0)
+    return decks[rng.permutation(len(decks))]
+
+
+def brute_force(pool, include, exclude):
+    return np.array([pos for pos, deck in enumerate(pool)
+                     if set(include) <= set(deck) and not set(exclude) & set(deck)], dtype=np.int64)
+
+
+def test_masks_round_trip(pool):
+    masks = deck_masks(pool)
+    np.testing.assert_array_equal(masks_to_decks(masks), pool)
+    np.testing.assert_array_equal(deck_masks(pool[:, ::-1]), masks)
+    unique, counts = count_unique_masks(np.vstack([masks, masks[:10]]))
+    assert len(unique) == len(pool) and counts.sum() == len(pool) + 10
+
+
+@pytest.mark.parametrize("include, exclude", [
+    ([5], []), ([5], [70]), ([3, 64], []), ([3, 64], [7, 100]), ([], [0, 63, 64, 109]),
+    ([10, 11], [12, 13, 14]), ([109], [1, 2]),
+])
+def test_query_pool_matches_brute_force(pool, include, exclude):
+    index = build_pool_index(deck_masks(pool), N_CARDS)
+    expected = brute_force(pool, include, exclude)
+    assert len(expected) > 1
+    np.testing.assert_array_equal(query_pool(index, include, exclude), expected)
+    np.testing.assert_array_equal(query_pool(index, include, exclude, k=1), expected[:1])
+    np.testing.assert_array_equal(query_pool(index, include, exclude, k=5), expected[:5])
+
+
+def test_query_pool_fast_path_and_missing_card(pool):
+    index = build_pool_index(deck_masks(pool), N_CARDS)
+    for card in (0, 63, 64, 109):
+        np.testing.assert_array_equal(query_pool(index, [card], k=1), brute_force(pool, [card], [])[:1])
+    # A card no pool deck holds: the first-deck shortcut must not return position -1
+    index = build_pool_index(deck_masks(pool[~(pool == 42).any(axis=1)]), N_CARDS)
+    assert len(query_pool(index, [42], k=1)) == 0
+    assert len(query_pool(index, [42, 1])) == 0
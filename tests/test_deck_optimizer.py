@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from deck_optimizer import constraint_distance, deck_synergy, optimize_deck, swap_gains, swap_mask
+
+N_CARDS = 40
+
+
+@pytest.fixture
+def synergy():
+    rng = np.random.default_rng(3)
+    s = rng.normal(0, 0.05, (N_CARDS, N_CARDS))
+    s = (s + s.T) / 2
+    np.fill_diagonal(s, 0)
+    return s
+
+
+@pytest.fixture
+def elixir():
+    return np.random.default_rng(4).integers(1, 8, N_CARDS).astype(np.float64)
+
+
+def test_swap_gains_match_brute_force(synergy):
+    deck = np.array([0, 3, 7, 11, 19, 23, 30, 38])
+    gains = swap_gains(synergy, deck)
+    base = deck_synergy(synergy, deck)
+    for slot in range(8):
+        for card in range(N_CARDS):
+            if card in deck:
+                continue
+            swapped = deck.copy()
+            swapped[slot] = card
+            assert gains[slot, card] == pytest.approx(deck_synergy(synergy, swapped) - base)
+
+
+def test_swap_mask_respects_constraints(elixir):
+    deck = np.arange(8)
+    mask = swap_mask(deck, N_CARDS, locked_cards=[2], elixir=elixir, elixir_range=(3.0, 4.0))
+    assert not mask[:, deck].any()
+    assert not mask[2].any()
+    for slot, card in zip(*np.nonzero(mask)):
+        swapped = deck.copy()
+        swapped[slot] = card
+        assert 3.0 <= elixir[swapped].mean() <= 4.0
+
+
+def test_results_improve_and_replay(synergy):
+    deck = np.arange(8)
+    reached = optimize_deck(synergy, deck, max_swaps=3)
+    scores = [score for _, score, _ in reached]
+    assert scores == sorted(scores, reverse=True)
+    for result, score, swaps in reached:
+        replayed = deck.copy()
+        for slot, card_out, card_in in swaps:
+            assert replayed[slot] == card_out
+            replayed[slot] = card_in
+        np.testing.assert_array_equal(replayed, result)
+        assert score == pytest.approx(deck_synergy(synergy, result))
+        assert len(swaps) <= 3
+
+
+def test_start_deck_outside_elixir_range_is_not_returned(synergy, elixir):
+    # The cheapest cards, asked to end up well above their average: more than one swap away
+    deck = np.argsort(elixir)[:8]
+    elixir_range = (elixir[deck].mean() + 1.5, 8.0)
+    assert constraint_distance(deck, elixir=elixir, elixir_range=elixir_range) > 0
+
+    reached = optimize_deck(synergy, deck, max_swaps=3, elixir=elixir, elixir_range=elixir_range)
+    assert reached
+    for result, _, swaps in reached:
+        assert swaps
+        assert constraint_distance(result, elixir=elixir, elixir_range=elixir_range) == 0
+
+
+def test_unreachable_constraints_give_no_result(synergy, elixir):
+    reached = optimize_deck(synergy, np.arange(8), max_swaps=2, elixir=elixir, elixir_range=(20.0, 30.0))
+    assert reached == []
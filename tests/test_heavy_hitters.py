@@ -0,0 +1,75 @@
+import numpy as np
+
+from deck_masks import count_unique_masks, deck_masks
+from engine import META_POOL_SIZE, engine_from_battles
+from heavy_hitters import guaranteed_top, merge_summaries, summarize_masks, summary_top
+from ingest import winning_deck_summary
+
+
+def winning_masks(battles):
+    p1_won = np.asarray(battles["crowns1"]) > np.asarray(battles["crowns2"])
+    return deck_masks(np.vstack((battles["p1_decks"][p1_won], battles["p2_decks"][~p1_won])))
+
+
+def exact_top(masks, k):
+    # Brute force: every distinct deck counted, most frequent first, ties in mask order
+    unique, counts = count_unique_masks(masks)
+    order = np.argsort(-counts, kind="stable")[:k]
+    return unique[order], counts[order]
+
+
+def test_day_summary_top_is_exact(day_battles):
+    summary = winning_deck_summary(day_battles)
+    top_masks, top_counts, top_errors = summary_top(summary, META_POOL_SIZE)
+    exact_masks, exact_counts = exact_top(winning_masks(day_battles), META_POOL_SIZE)
+
+    np.testing.assert_array_equal(top_counts, exact_counts)
+    np.testing.assert_array_equal(top_masks, exact_masks)
+    assert not top_errors.any()
+    assert guaranteed_top(summary, META_POOL_SIZE) == len(top_counts)
+
+
+def test_day_engine_meta_pool_is_exact(day_battles, tmp_path):
+    # The all-trophies pool must not come from merged (truncated) bracket summaries
+    engine = engine_from_battles(day_battles, tmp_path / "brackets.npz", tmp_path / "archetypes.npz")
+    exact_masks, exact_counts = exact_top(winning_masks(day_battles), META_POOL_SIZE)
+    pos = {int(c): i for i, c in enumerate(day_battles["card_ids"])}
+    pool_masks = deck_masks(np.vectorize(pos.get)(engine.meta_pool_5000))
+
+    np.testing.assert_array_equal(pool_masks, exact_masks)
+    assert engine.meta_guaranteed == len(exact_counts)
+    assert engine.meta_max_error == 0
+
+
+def test_merged_summaries_bound_true_counts(battles):
+    # Space-Saving guarantees: count - error <= true <= count, untracked decks <= floor
+    masks = winning_masks(battles)
+    chunks = np.array_split(masks, 7)
+    merged = merge_summaries(summarize_masks(chunk, capacity=500) for chunk in chunks)
+    merged = merge_summaries([merged], capacity=500)
+
+    unique, true_counts = count_unique_masks(masks)
+    true = {m.tobytes(): int(c) for m, c in zip(unique, true_counts)}
+    tracked = np.array([true[m.tobytes()] for m in merged["masks"]])
+    assert (merged["counts"] - merged["errors"] <= tracked).all()
+    assert (tracked <= merged["counts"]).all()
+
+    tracked_keys = {m.tobytes() for m in merged["masks"]}
+    untracked = [c for m, c in true.items() if m not in tracked_keys]
+    assert max(untracked) <= merged["floor"]
+    assert int(merged["total"]) == len(masks)
+
+
+def test_guaranteed_top_decks_are_in_true_top(battles):
+    masks = winning_masks(battles)
+    merged = merge_summaries(summarize_masks(chunk, capacity=300) for chunk in np.array_split(masks, 5))
+    k = 50
+    guaranteed = guaranteed_top(merged, k)
+    top_masks, _, _ = summary_top(merged, k)
+
+    _, exact_counts = exact_top(masks, k)
+    unique, counts = count_unique_masks(masks)
+    true = {m.tobytes(): int(c) for m, c in zip(unique, counts)}
+    # At least `guaranteed` reported decks are as frequent as the true k-th deck
+    in_true_top = sum(true[m.tobytes()] >= exact_counts[-1] for m in top_masks)
+    assert 0 < guaranteed <= in_true_top
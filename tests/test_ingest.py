@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from battle_store import encode_battles, read_battle_archive
+from benchmarks.synthetic_battles import synthetic_battles, write_synthetic_archive
+from ingest import CARD_TABLES, aggregate_archive, aggregate_battles, deck_summary, merge_aggregates
+
+CARD_IDS = np.arange(26000000, 26000060, dtype=np.int64)
+ADDITIVE = ("n_battles", "card_wins", "card_matches") + CARD_TABLES
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return synthetic_battles(6_000, np.random.default_rng(5), CARD_IDS, n_archetypes=300, missing_rate=0.0)
+
+
+def summary_counts(agg):
+    # Deck mask -> winning count; summaries hold every deck here, so the counts are exact
+    summary = deck_summary(agg)
+    assert not summary["errors"].any()
+    return {mask.tobytes(): int(count) for mask, count in zip(summary["masks"], summary["counts"])}
+
+
+def assert_same_aggregate(merged, whole):
+    np.testing.assert_array_equal(merged["card_ids"], whole["card_ids"])
+    for name in ADDITIVE:
+        np.testing.assert_array_equal(merged[name], whole[name], err_msg=name)
+    assert summary_counts(merged) == summary_counts(whole)
+
+
+def test_merged_chunks_equal_whole(frame):
+    # Chunks encoded against differently ordered (and partial) vocabularies, as separate days are
+    whole = aggregate_battles(encode_battles(frame, CARD_IDS))
+    vocabularies = (CARD_IDS, CARD_IDS[::-1], CARD_IDS[:10])
+    parts = [
+        aggregate_battles(encode_battles(frame.iloc[start:start + 2_000], vocab))
+        for start, vocab in zip(range(0, len(frame), 2_000), vocabularies)
+    ]
+    assert not np.array_equal(parts[1]["card_ids"], whole["card_ids"])
+    assert_same_aggregate(merge_aggregates(parts), whole)
+
+
+def test_merge_skips_tables_missing_from_a_day(frame):
+    parts = [aggregate_battles(encode_battles(frame.iloc[:3_000], CARD_IDS)),
+             aggregate_battles(encode_battles(frame.iloc[3_000:], CARD_IDS), pair_tables=False)]
+    merged = merge_aggregates(parts)
+    assert "pair_wins" not in merged
+    assert merged["n_battles"] == len(frame)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_chunked_archive_equals_whole(tmp_path, workers):
+    archive = write_synthetic_archive(tmp_path / "day.zip", 5_000, seed=9, card_ids=CARD_IDS)
+    whole = aggregate_battles(encode_battles(read_battle_archive(archive)))
+    assert_same_aggregate(aggregate_archive(archive, workers=workers, chunk_bytes=64 << 10), whole)
@@ -0,0 +1,64 @@
+import numpy as np
+
+from meta_matrix import (
+    TIERS, build_meta_matrix, expected_win_rates, matrix_path, open_meta_matrix, pairwise_win_probs, tier_list
+)
+from oracle_engine import WEIGHTS_FILE, NumpyOracle
+
+
+def random_win_probs(n, seed=2):
+    return np.random.default_rng(seed).random((n, n))
+
+
+def test_expected_win_rates_match_brute_force():
+    win_probs = random_win_probs(37)
+    expected = []
+    for d in range(len(win_probs)):
+        others = [o for o in range(len(win_probs)) if o != d]
+        as_p2 = np.mean([win_probs[o, d] for o in others])
+        as_p1 = np.mean([1 - win_probs[d, o] for o in others])
+        expected.append((as_p2 + as_p1) / 2)
+    np.testing.assert_allclose(expected_win_rates(win_probs, chunk_rows=5), expected)
+
+
+def test_tier_list_orders_and_buckets_by_percentile():
+    win_probs = random_win_probs(200).astype(np.float16)
+    order, expected, tiers = tier_list(win_probs)
+    assert sorted(order.tolist()) == list(range(200))
+    assert np.all(np.diff(expected[order]) <= 0)
+    # Best decks get the best tiers; each tier holds its percentile band of the pool
+    ranks = {name: i for i, (name, _) in enumerate(TIERS)}
+    assert np.all(np.diff([ranks[t] for t in tiers[order]]) >= 0)
+    shares = {name: np.mean(tiers == name) for name, _ in TIERS}
+    bounds = [1.0] + [q for _, q in TIERS]
+    for (name, lower), upper in zip(TIERS, bounds):
+        assert abs(shares[name] - (upper - lower)) <= 0.01
+
+
+def test_tier_list_of_an_even_pool():
+    order, expected, tiers = tier_list(np.full((10, 10), 0.5))
+    np.testing.assert_allclose(expected, 0.5)
+    assert set(tiers) == {"S"}
+
+
+def test_built_matrix_matches_model_and_prefix_lookup(tmp_path):
+    oracle = NumpyOracle.load(WEIGHTS_FILE)
+    rng = np.random.default_rng(4)
+    pool = np.array([rng.choice(np.arange(1, len(oracle.embedding)), 8, replace=False) for _ in range(40)])
+    card_to_idx = {}
+    path = build_meta_matrix(oracle, pool, card_to_idx, str(tmp_path), model_files=(WEIGHTS_FILE,))
+    assert path == matrix_path(pool, str(tmp_path), (WEIGHTS_FILE,))
+
+    win_probs = np.load(path)
+    for i in (0, 17, 39):
+        full = oracle.predict_pairs(np.repeat(pool[i:i + 1], len(pool), axis=0), pool)
+        np.testing.assert_allclose(win_probs[i], full, atol=1e-3)
+    np.testing.assert_allclose(
+        win_probs, pairwise_win_probs(oracle, pool, np.empty((40, 40)), batch_pairs=100), atol=1e-3
+    )
+
+    # A larger pool whose prefix was built is served from the built matrix
+    bigger = np.vstack([pool, pool[:5]])
+    found = open_meta_matrix(bigger, sizes=(40, 45), matrix_dir=str(tmp_path), model_files=(WEIGHTS_FILE,))
+    assert found.shape == (40, 40)
+    assert open_meta_matrix(pool[::-1], sizes=(40,), matrix_dir=str(tmp_path), model_files=(WEIGHTS_FILE,)) is None
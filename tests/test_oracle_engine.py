@@ -0,0 +1,124 @@
+import io
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from battle_store import CARD_MAPPING_FILE
+from oracle_engine import WEIGHTS_FILE, KerasOracle, NumpyOracle, encode_card_array, encode_decks, export_weights
+from predict import card_name_index, predict_decks, resolve_cards, run
+
+MODEL_FILE = "clash_royale_nn_model.keras"
+
+
+@pytest.fixture(scope="module")
+def numpy_oracle():
+    return NumpyOracle.load(WEIGHTS_FILE)
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    tf = pytest.importorskip("tensorflow")
+    return tf.keras.models.load_model(MODEL_FILE)
+
+
+@pytest.fixture(scope="module")
+def decks(numpy_oracle):
+    rng = np.random.default_rng(21)
+    n_cards = len(numpy_oracle.embedding)
+    return np.array([rng.choice(n_cards, 8, replace=False) for _ in range(96)], dtype=np.int32)
+
+
+def test_fused_scores_match_full_network(numpy_oracle, decks):
+    # The split first layer (cached meta projection + per-opponent half) is the same network
+    opponents, meta = decks[:16], decks[16:]
+    projection = numpy_oracle.project_meta(numpy_oracle.embed(meta))
+    scores = numpy_oracle.score_many(opponents, projection)
+    for i, opponent in enumerate(opponents):
+        full = numpy_oracle.predict_pairs(np.repeat([opponent], len(meta), axis=0), meta)
+        np.testing.assert_allclose(scores[i], full, atol=1e-6)
+        np.testing.assert_allclose(numpy_oracle.score_against(opponent, projection), full, atol=1e-6)
+
+
+def test_numpy_oracle_matches_keras(numpy_oracle, keras_model, decks):
+    keras_oracle = KerasOracle(keras_model)
+    decks1, decks2 = decks[:48], decks[48:]
+    expected = keras_model.predict([decks1, decks2], verbose=0).ravel()
+    np.testing.assert_allclose(numpy_oracle.predict_pairs(decks1, decks2), expected, atol=1e-5)
+    np.testing.assert_allclose(keras_oracle.predict_pairs(decks1, decks2), expected, atol=1e-5)
+
+    projection = keras_oracle.project_meta(keras_oracle.embed(decks2))
+    np.testing.assert_allclose(
+        numpy_oracle.score_many(decks1, numpy_oracle.project_meta(numpy_oracle.embed(decks2))),
+        keras_oracle.score_many(decks1, projection), atol=1e-5
+    )
+
+
+def test_exported_weights_round_trip(numpy_oracle, keras_model, tmp_path, decks):
+    path = tmp_path / "weights.npz"
+    export_weights(keras_model, path)
+    exported = NumpyOracle.load(path)
+    np.testing.assert_array_equal(exported.embedding, numpy_oracle.embedding)
+    np.testing.assert_array_equal(exported.predict_pairs(decks[:48], decks[48:]),
+                                  numpy_oracle.predict_pairs(decks[:48], decks[48:]))
+
+
+@pytest.fixture(scope="module")
+def card_to_idx():
+    with open(CARD_MAPPING_FILE, "rb") as f:
+        return pickle.load(f)
+
+
+def test_encode_card_array_matches_encode_decks(card_to_idx):
+    rng = np.random.default_rng(6)
+    # Mapped ids, unmapped raw ids (-> 0) and ids that are already model indices
+    pool = np.concatenate([list(card_to_idx), [26999999, 28999999], np.arange(0, 120)])
+    decks = rng.choice(pool, (500, 8))
+    np.testing.assert_array_equal(encode_card_array(decks, card_to_idx), encode_decks(decks, card_to_idx))
+
+
+def test_predict_flags_unknown_and_repeated_cards(numpy_oracle, card_to_idx):
+    known = np.array(sorted(card_to_idx), dtype=np.int64)
+    deck = known[:8]
+    p1 = np.array([deck, np.r_[deck[:7], 99999999], np.r_[deck[:7], 5], np.repeat(deck[0], 8), deck[::-1]])
+    p2 = np.repeat([known[8:16]], len(p1), axis=0)
+    probs, errors = predict_decks(numpy_oracle, card_to_idx, p1, p2)
+    assert errors.tolist() == ["", "unknown or missing card", "unknown or missing card", "unknown or missing card", ""]
+    assert np.isnan(probs[1:4]).all()
+    assert probs[0] == pytest.approx(probs[4])
+
+
+def run_file(tmp_path, name, text, oracle, card_to_idx, fmt):
+    path = tmp_path / name
+    path.write_text(text)
+    out = io.BytesIO()
+    run(str(path), out, oracle, card_to_idx, card_name_index(), batch_size=2, fmt=fmt, log=io.StringIO())
+    return out.getvalue().decode()
+
+
+def test_predict_reports_wrong_card_counts(tmp_path, numpy_oracle, card_to_idx):
+    names = [name for name, card in card_name_index().items() if card in card_to_idx and name[0].isupper()]
+    deck1, deck2 = names[:8], names[8:16]
+    decks = [(deck1, deck2), (deck1 + [names[20]], deck2), (deck1[:7], deck2), (deck1, deck2 + [names[20]])]
+
+    rows = [json.loads(line) for line in run_file(
+        tmp_path, "pairs.jsonl", "".join(json.dumps({"deck1": a, "deck2": b}) + "\n" for a, b in decks),
+        numpy_oracle, card_to_idx, "jsonl"
+    ).splitlines()]
+    assert [row.get("error") for row in rows] == [None, "wrong card count", "wrong card count", "wrong card count"]
+    assert rows[0]["p2_win_prob"] is not None and all(row["p2_win_prob"] is None for row in rows[1:])
+
+    csv_text = "deck1,deck2\n" + "".join(f"{';'.join(a)},{';'.join(b)}\n" for a, b in decks)
+    lines = run_file(tmp_path, "pairs.csv", csv_text, numpy_oracle, card_to_idx, "csv").splitlines()
+    errors = [line.rsplit(",", 1)[1].strip('"') for line in lines[1:]]
+    assert errors == ["", "wrong card count", "wrong card count", "wrong card count"]
+    p2_prob = float(lines[1].rsplit(",", 2)[1])
+    assert p2_prob == pytest.approx(rows[0]["p2_win_prob"])
+
+
+def test_resolve_cards_maps_names_and_ids(card_to_idx):
+    card = next(iter(card_to_idx))
+    name = next(name for name, c in card_name_index().items() if c == card)
+    cells = np.array([[name, name.lower(), str(card), "no such card"]], dtype=object)
+    assert resolve_cards(cells, card_name_index()).tolist() == [[card, card, card, -1]]
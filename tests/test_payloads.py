@@ -0,0 +1,21 @@
+import base64
+import os
+
+from payloads import asset_signature, data_uri
+
+
+def test_edited_asset_changes_signature_and_uri(tmp_path):
+    path = tmp_path / "wallpaper.jpeg"
+    path.write_bytes(b"old")
+    before = asset_signature([str(path)])
+    assert data_uri(str(path), "image/jpeg") == "data:image/jpeg;base64," + base64.b64encode(b"old").decode()
+
+    path.write_bytes(b"edited")
+    os.utime(path, ns=(before[0][1] + 10**9, before[0][1] + 10**9))
+    assert asset_signature([str(path)]) != before
+    assert data_uri(str(path), "image/jpeg").endswith(base64.b64encode(b"edited").decode())
+
+
+def test_missing_asset():
+    assert asset_signature(["no-such-file.otf"]) == (("no-such-file.otf", None, None),)
+    assert data_uri("no-such-file.otf", "font/otf") is None
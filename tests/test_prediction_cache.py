@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from oracle_engine import WEIGHTS_FILE, NumpyOracle
+from prediction_cache import LRUCache, cached_matchup_probability, canonical_deck
+
+
+class CountingOracle:
+    def __init__(self, oracle):
+        self.oracle = oracle
+        self.calls = 0
+
+    def predict_pairs(self, decks1, decks2):
+        self.calls += 1
+        return self.oracle.predict_pairs(decks1, decks2)
+
+
+def test_canonical_deck_ignores_card_order():
+    deck = np.array([12, 3, 99, 41, 7, 60, 5, 88], dtype=np.int32)
+    assert canonical_deck(deck) == canonical_deck(deck[::-1]) == canonical_deck(list(np.roll(deck, 3)))
+    assert canonical_deck(deck) == (3, 5, 7, 12, 41, 60, 88, 99)
+    assert all(type(c) is int for c in canonical_deck(deck))
+
+
+def test_model_is_order_invariant():
+    # What makes the canonical key safe: the towers average card embeddings
+    oracle = NumpyOracle.load(WEIGHTS_FILE)
+    rng = np.random.default_rng(8)
+    decks = np.array([rng.choice(len(oracle.embedding), 8, replace=False) for _ in range(20)])
+    shuffled = np.array([rng.permutation(deck) for deck in decks])
+    np.testing.assert_allclose(oracle.predict_pairs(decks[:10], decks[10:]),
+                               oracle.predict_pairs(shuffled[:10], shuffled[10:]), atol=1e-6)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    cache.put("a", 4)
+    assert cache.get("a") == 4
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 4, "misses": 1, "hit_rate": 0.8}
+
+
+def test_lru_is_bounded_under_threads():
+    cache = LRUCache(maxsize=100)
+
+    def work(worker):
+        for i in range(1_000):
+            cache.put((worker, i % 150), i)
+            cache.get((worker, (i * 7) % 150))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(8)))
+    stats = cache.stats()
+    assert stats["size"] == 100
+    assert stats["hits"] + stats["misses"] == 8_000
+
+
+def test_cached_probability_shares_reordered_pairs():
+    oracle = CountingOracle(NumpyOracle.load(WEIGHTS_FILE))
+    cache = LRUCache()
+    deck1, deck2 = np.arange(1, 9), np.arange(20, 28)
+    prob = cached_matchup_probability(cache, oracle, deck1, deck2)
+    assert cached_matchup_probability(cache, oracle, deck1[::-1], np.roll(deck2, 2)) == prob
+    assert oracle.calls == 1
+    assert prob == pytest.approx(float(oracle.oracle.predict_pairs([deck1], [deck2])[0]), abs=1e-6)
+    # Swapping sides is a different matchup
+    cached_matchup_probability(cache, oracle, deck2, deck1)
+    assert oracle.calls == 2